@@ -0,0 +1,248 @@
+"""解析和组装流程的离线基准测试
+
+用仓库中录制的页面文本（jsdxudpy.txt、szdxyw）作为数据，另外按 10 倍、100 倍、1000 倍放大
+（每份副本的地址加上不同的查询参数，避免被去重合并），对解析和组装的各个函数分别计时：
+
+- extract_and_filter_channels（layouts.py 中 scrape_ips 使用的 ranked 组织方式）
+- extract_valid_channels、filter_channels_by_type、remove_duplicate_channels（template 组织方式），
+  save_results（按 scrape_ips_1 配置组织频道并保存，输出写到临时目录）
+- search_channels_in_content：按频道名逐个搜索页面文本的写法（脚本已不再使用，保留在本文件中作对照）
+
+输出每项的吞吐量（行/秒）和峰值内存（tracemalloc），并与保存的基线对比，
+吞吐量下降或内存上涨超过阈值时标记为退化并以非零状态退出。全程不需要浏览器和网络。
+
+    python pl10000/benchmark.py                      # 运行并与基线对比
+    python pl10000/benchmark.py --save-baseline      # 运行并保存为新的基线
+    python pl10000/benchmark.py --scales 1,10 --only extract_valid_channels
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import layouts
+from channel_parser import iter_lines
+from output_writer import atomic_write
+from perf import pad_display
+from scrape_engine import save_playlist
+from targets import load_targets
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKSPACE_ROOT = os.path.dirname(SCRIPT_DIR)
+
+# 录制的页面文本
+FIXTURES = {
+    "jsdxudpy": os.path.join(WORKSPACE_ROOT, "jsdxudpy.txt"),
+    "szdxyw": os.path.join(WORKSPACE_ROOT, "szdxyw"),
+}
+
+SCALES = (1, 10, 100, 1000)
+
+BASELINE_PATH = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+
+# 吞吐量下降或峰值内存上涨超过该比例视为退化
+REGRESSION_THRESHOLD = 0.25
+
+# 每项至少重复的次数和累计时长（秒），取最快的一次
+MIN_REPEATS = 5
+MIN_TOTAL_TIME = 0.5
+MAX_REPEATS = 50
+
+
+def scale_text(text, factor):
+    """把页面文本放大 factor 倍；副本中的地址加上 copy 参数，保证每一行都是不同的候选地址"""
+    lines = text.splitlines()
+    scaled = []
+    for copy in range(factor):
+        for line in lines:
+            if copy and "," in line and not line.lstrip().startswith("#"):
+                name, _, rest = line.partition(",")
+                url, separator, extra = rest.partition(",")
+                line = f"{name},{url}{'&' if '?' in url else '?'}copy={copy}{separator}{extra}"
+            scaled.append(line)
+    return "\n".join(scaled) + "\n"
+
+
+def _target_names():
+    cctv_channels, tv_stations = layouts.get_base_channels()
+    cctv_names = [cctv[0] for cctv in cctv_channels] + [cctv[1] for cctv in cctv_channels]
+    return cctv_channels, tv_stations, cctv_names
+
+
+def _save_results(lines):
+    """按 scrape_ips_1 配置组织频道并保存到临时目录，屏蔽其输出和 $GITHUB_OUTPUT"""
+    profile = load_targets().profile("scrape_ips_1")
+    directory = tempfile.mkdtemp(prefix="bench-")
+    github_output = os.environ.pop("GITHUB_OUTPUT", None)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            layout = layouts.get_layout(profile)
+            layout.lines.extend(lines)
+            save_playlist(layout.playlist(), os.path.join(directory, profile.output + ".txt"), backup_dir=directory)
+    finally:
+        if github_output is not None:
+            os.environ["GITHUB_OUTPUT"] = github_output
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def search_channels_in_content(text_content, target_channels):
+    """在内容中搜索目标频道，每个频道取第一条匹配的行"""
+    # 每个目标频道只编译一次匹配模式，允许频道名称前后有其他字符
+    pending = {}
+    for channel in target_channels:
+        if channel not in pending:
+            pattern = re.compile(rf'{re.escape(channel)}[^,]*,(rtp://|udp://|http://|https://)\S+', re.IGNORECASE)
+            pending[channel] = (channel.lower(), pattern)
+
+    # 单次逐行扫描，全部找到后提前结束
+    matched = {}
+    for line in iter_lines(text_content):
+        lowered = line.lower()
+        for channel, (channel_lower, pattern) in list(pending.items()):
+            if channel_lower in lowered and pattern.search(line):
+                matched[channel] = line.strip()
+                del pending[channel]
+        if not pending:
+            break
+
+    return [matched[channel] for channel in target_channels if channel in matched]
+
+
+def build_cases(text):
+    """返回 [(名称, 函数)]；输入在这里预先准备好，计时只包含被测函数本身"""
+    _, tv_stations, cctv_names = _target_names()
+    profile = load_targets().profile("scrape_ips")
+    lines = layouts.extract_valid_channels(text)
+    matched = layouts.filter_channels_by_type(lines, cctv_names) + layouts.filter_channels_by_type(lines, tv_stations)
+    return [
+        ("extract_and_filter_channels", lambda: layouts.extract_and_filter_channels(text, profile)),
+        ("extract_valid_channels", lambda: layouts.extract_valid_channels(text)),
+        ("search_channels_in_content", lambda: search_channels_in_content(text, cctv_names + tv_stations)),
+        ("filter_channels_by_type", lambda: layouts.filter_channels_by_type(lines, cctv_names)),
+        ("remove_duplicate_channels", lambda: layouts.remove_duplicate_channels(lines)),
+        ("save_results", lambda: _save_results(matched)),
+    ]
+
+
+def measure(func):
+    """返回 (最快一次的耗时, 峰值内存字节数)"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < MAX_REPEATS and (len(timings) < MIN_REPEATS or time.perf_counter() - started < MIN_TOTAL_TIME):
+        begin = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - begin)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def run(fixtures=FIXTURES, scales=SCALES, only=None):
+    """运行所有基准，返回 {键: 结果}，键为 "名称|数据|x倍数" """
+    results = {}
+    for fixture, path in fixtures.items():
+        with open(path, encoding="utf-8") as f:
+            original = f.read()
+        for factor in scales:
+            text = scale_text(original, factor)
+            line_count = text.count("\n")
+            for name, func in build_cases(text):
+                if only and name not in only:
+                    continue
+                best, peak = measure(func)
+                results[f"{name}|{fixture}|x{factor}"] = {
+                    "lines": line_count,
+                    "seconds": round(best, 6),
+                    "lines_per_sec": round(line_count / best if best else 0.0, 1),
+                    "peak_kb": round(peak / 1024, 1),
+                }
+    return results
+
+
+def find_regressions(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """返回 {键: 说明}，只比较基线中存在的项"""
+    regressions = {}
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        reasons = []
+        if result["lines_per_sec"] < base["lines_per_sec"] * (1 - threshold):
+            reasons.append(f"吞吐量 {base['lines_per_sec']:.0f} -> {result['lines_per_sec']:.0f} 行/秒")
+        if result["peak_kb"] > base["peak_kb"] * (1 + threshold):
+            reasons.append(f"峰值内存 {base['peak_kb']:.0f} -> {result['peak_kb']:.0f} KB")
+        if reasons:
+            regressions[key] = "；".join(reasons)
+    return regressions
+
+
+def print_results(results, baseline, regressions):
+    print(pad_display("基准", 30) + pad_display("数据", 10) + pad_display("倍数", 6, True)
+          + pad_display("行数", 10, True) + pad_display("行/秒", 14, True) + pad_display("峰值KB", 10, True)
+          + pad_display("对比基线", 10, True))
+    for key, result in results.items():
+        name, fixture, factor = key.split("|")
+        base = baseline.get(key)
+        change = f"{result['lines_per_sec'] / base['lines_per_sec'] - 1:+.0%}" if base and base["lines_per_sec"] else "-"
+        flag = "  ⚠️" if key in regressions else ""
+        # 数据名来自 --fixture 的文件名，可能含中文，与表头一样按显示宽度对齐
+        print(
+            pad_display(name, 30) + pad_display(fixture, 10) + pad_display(factor, 6, True)
+            + pad_display(result["lines"], 10, True) + pad_display(f"{result['lines_per_sec']:.0f}", 14, True)
+            + pad_display(f"{result['peak_kb']:.0f}", 10, True) + pad_display(change, 10, True) + flag
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析和组装流程的离线基准测试")
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)), help="放大倍数，逗号分隔")
+    parser.add_argument("--only", default="", help="只运行这些基准，逗号分隔")
+    parser.add_argument("--fixture", action="append", default=[], help="额外的页面文本文件，可重复")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="退化阈值（比例）")
+    args = parser.parse_args()
+
+    fixtures = dict(FIXTURES)
+    for path in args.fixture:
+        fixtures[os.path.splitext(os.path.basename(path))[0]] = path
+    scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+    only = {name.strip() for name in args.only.split(",") if name.strip()}
+
+    results = run(fixtures, scales, only)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = find_regressions(results, baseline, args.threshold)
+    print_results(results, baseline, regressions)
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        report = {"saved_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "python": sys.version.split()[0], "results": merged}
+        atomic_write(args.baseline, json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        print(f"💾 基线已保存到: {args.baseline}")
+    elif regressions:
+        print(f"\n❌ {len(regressions)} 项相对基线退化（阈值 {args.threshold:.0%}）:")
+        for key, reason in regressions.items():
+            print(f"  {key}: {reason}")
+        sys.exit(1)
+    elif baseline:
+        print("\n✅ 没有相对基线的退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""浏览器相关的公共操作：启动Chrome、定位"搜搜"页面、加载单个省份的内容
+
+只需要读取 body 文本，默认使用精简的浏览配置：不加载图片、样式表、字体和媒体，
+拦截统计/广告等第三方资源，页面加载策略为 eager（DOM 解析完成即返回）。
+设置 SCRAPE_FULL_PAGE_LOAD=1 恢复完整加载，便于调试和截图。
+"""
+import os
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from page_ready import (
+    FULL_PAGE_LOAD,
+    get_body_text,
+    wait_for_channels,
+    wait_for_document_ready,
+    wait_for_dom_quiet,
+)
+from perf import span, text_stats
+from snapshots import capture_html
+
+# 初始页面
+LANDING_URL = "https://pl10000.infinityfreeapp.com/10.html"
+
+# "搜搜"图标的选择器，按顺序尝试
+SEARCH_ICON_LOCATORS = [
+    (By.CSS_SELECTOR, '.icon[data-title="搜搜"]'),
+    (By.XPATH, "//div[@class='icon' and contains(@data-title, '搜')]"),
+]
+
+# "搜搜"页面所在iframe的id
+SEARCH_FRAME_ID = "browser"
+
+ELEMENT_TIMEOUT = 20
+
+# 精简加载时拦截的资源：按扩展名拦截图片、样式表、字体和媒体，按域名拦截统计/广告
+_BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp",
+    "css", "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mp3", "m4a",
+)
+_BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "doubleclick.net",
+    "fonts.googleapis.com", "fonts.gstatic.com", "hm.baidu.com", "cnzz.com", "51.la",
+)
+BLOCKED_URL_PATTERNS = (
+    [f"*.{ext}" for ext in _BLOCKED_EXTENSIONS]
+    + [f"*.{ext}?*" for ext in _BLOCKED_EXTENSIONS]
+    + [f"*{domain}/*" for domain in _BLOCKED_DOMAINS]
+)
+
+# chromedriver-autoinstaller 安装的驱动路径，同一进程内只安装一次
+_installed_driver_path = None
+
+
+def build_chrome_options(download_dir=None, profile_dir=None, lean=not FULL_PAGE_LOAD):
+    """无头Chrome的选项；profile_dir 指定时使用持久的浏览器配置目录（保留HTTP缓存）"""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')  # 无头模式
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--window-size=1920,1080')
+    if profile_dir:
+        chrome_options.add_argument(f'--user-data-dir={profile_dir}')
+
+    # 设置下载路径（默认为当前工作目录）
+    prefs = {
+        "download.default_directory": download_dir or os.getcwd(),
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+
+    if lean:
+        # DOM 解析完成即返回，不等图片等子资源；图片在渲染层面也关闭
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument('--disable-remote-fonts')
+        chrome_options.add_argument('--mute-audio')
+        prefs["profile.managed_default_content_settings.images"] = 2
+
+    chrome_options.add_experimental_option("prefs", prefs)
+
+    return chrome_options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """通过 DevTools 协议拦截不需要的资源请求，浏览器不支持时忽略"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception as e:
+        print(f"⚠️  无法设置资源拦截: {e}")
+
+
+def create_driver(chrome_options, lean=not FULL_PAGE_LOAD):
+    """启动Chrome，失败时尝试用chromedriver-autoinstaller安装驱动后重试（安装结果在进程内复用）
+
+    lean 为 True 时拦截图片、样式表、字体和第三方统计/广告资源。
+    """
+    global _installed_driver_path
+    with span("browser.start"):
+        if _installed_driver_path:
+            driver = webdriver.Chrome(service=Service(_installed_driver_path), options=chrome_options)
+        else:
+            try:
+                driver = webdriver.Chrome(options=chrome_options)
+            except Exception as e:
+                print(f"⚠️  初始化Chrome失败: {e}")
+                print("尝试使用chromedriver-autoinstaller...")
+                import chromedriver_autoinstaller
+                with span("browser.driver_install"):
+                    _installed_driver_path = chromedriver_autoinstaller.install()
+                driver = webdriver.Chrome(service=Service(_installed_driver_path), options=chrome_options)
+
+        if lean:
+            block_resources(driver)
+    return driver
+
+
+def open_search_frame(driver):
+    """打开初始页面并点击"搜搜"，切换进iframe后返回iframe的地址
+
+    找不到图标或iframe时停留在当前页面并返回None，调用方在当前页面继续搜索。
+    """
+    with span("page.open"):
+        driver.get(LANDING_URL)
+        wait_for_document_ready(driver)
+
+    with span("frame.switch") as switch:
+        for locator in SEARCH_ICON_LOCATORS:
+            try:
+                element = WebDriverWait(driver, 10).until(EC.element_to_be_clickable(locator))
+                element.click()
+                wait_for_dom_quiet(driver)
+                break
+            except Exception:
+                print(f"⚠️  找不到搜搜图标: {locator[1]}")
+
+        try:
+            iframe = WebDriverWait(driver, ELEMENT_TIMEOUT).until(
+                EC.presence_of_element_located((By.ID, SEARCH_FRAME_ID))
+            )
+        except Exception:
+            print("⚠️  无法切换到iframe，尝试在当前页面搜索")
+            switch.set(found=0)
+            return None
+
+        frame_url = iframe.get_attribute("src")
+        driver.switch_to.frame(iframe)
+        wait_for_document_ready(driver)
+    print("✅ 成功切换到搜搜页面")
+    return frame_url or None
+
+
+def resolve_province_links(driver, provinces):
+    """在当前页面解析各省份按钮的直达地址，javascript/锚点链接记为None"""
+    links = {}
+    for province in provinces:
+        href = None
+        try:
+            href = driver.find_element(By.LINK_TEXT, province).get_attribute("href")
+        except Exception:
+            pass
+        if href and href.startswith(("http://", "https://")) and "#" not in href:
+            links[province] = href
+        else:
+            links[province] = None
+    return links
+
+
+def load_province(driver, province, frame_url=None, province_url=None):
+    """加载单个省份的内容并返回页面文本
+
+    有直达地址时直接打开；否则打开"搜搜"页面（或初始页面）再点击对应按钮。
+    """
+    with span("province.load", province=province, backend="selenium") as load:
+        if province_url:
+            driver.get(province_url)
+            text = wait_for_channels(driver)
+        else:
+            if frame_url:
+                driver.get(frame_url)
+                wait_for_document_ready(driver)
+            else:
+                open_search_frame(driver)
+
+            button = WebDriverWait(driver, ELEMENT_TIMEOUT).until(
+                EC.element_to_be_clickable((By.LINK_TEXT, province))
+            )
+            # 记录点击前的内容，用于判断新内容是否已加载
+            before_text = get_body_text(driver)
+            with span("province.click", province=province):
+                button.click()
+                text = wait_for_channels(driver, previous_text=before_text)
+        load.set(**text_stats(text))
+    capture_html(province, lambda: driver.page_source)
+    return text
+
+
+def save_debug_artifacts(driver, directory):
+    """出错时保存截图和页面源码，便于排查"""
+    try:
+        screenshot_path = os.path.join(directory, "error_screenshot.png")
+        driver.save_screenshot(screenshot_path)
+        print(f"📸 错误截图已保存为: {screenshot_path}")
+    except Exception:
+        pass
+
+    try:
+        debug_path = os.path.join(directory, "error_page_source.html")
+        with open(debug_path, "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        print(f"📄 页面源码已保存为: {debug_path}")
+    except Exception:
+        pass
@@ -0,0 +1,275 @@
+"""常驻的浏览器服务：保持预热的无头Chrome，通过本地套接字接收抓取任务
+
+每次运行脚本都要启动Chrome、打开初始页面并点进"搜搜"，冷启动要好几秒。
+服务模式下浏览器会话在任务之间保持打开：
+- 启动时预热一个会话并停留在"搜搜"页面，iframe 地址和各省份按钮的地址只解析一次
+- 浏览器使用持久的配置目录（每个会话一个子目录），HTTP缓存在任务之间和服务重启后都能复用
+- chromedriver 只安装一次，之后直接复用
+- 抓取失败的省份会清除缓存的地址，下一次任务重新解析
+
+协议为每行一个JSON：{"command": "fetch", "provinces": [...]} -> {"ok": true, "results": {省份: 文本}}，
+另有 ping 和 stop 命令。设置 SCRAPE_BROWSER_SERVICE=host:port 后，脚本的浏览器抓取会交给服务完成。
+
+    python pl10000/browser_service.py serve            # 启动服务
+    python pl10000/browser_service.py fetch 江苏电信     # 临时抓取，输出页面文本
+    python pl10000/browser_service.py stop             # 关闭服务
+"""
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+from browser import (
+    build_chrome_options,
+    create_driver,
+    open_search_frame,
+    resolve_province_links,
+)
+from page_ready import wait_for_document_ready
+from province_pool import POOL_SIZE, scrape_provinces
+
+# 服务地址，未设置时脚本直接启动浏览器
+SERVICE_ADDRESS = os.environ.get("SCRAPE_BROWSER_SERVICE", "")
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+# 持久的浏览器配置目录
+PROFILE_DIR = os.environ.get(
+    "SCRAPE_BROWSER_PROFILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".browser-profile"),
+)
+
+PING_TIMEOUT = 2
+
+
+def parse_address(address):
+    """把 "host:port" 解析成 (host, port)"""
+    host, _, port = (address or DEFAULT_ADDRESS).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class BrowserService:
+    """保持预热的浏览器会话，串行执行抓取任务（每个任务内部仍按会话池并行）"""
+
+    def __init__(self, options_factory=build_chrome_options, pool_size=POOL_SIZE, profile_dir=PROFILE_DIR):
+        self.options_factory = options_factory
+        self.pool_size = pool_size
+        self.profile_dir = profile_dir
+        self.idle_drivers = []
+        self.frame_url = None
+        self.province_links = {}
+        self._frame_resolved = False
+        self._job_lock = threading.Lock()
+        self._slot_lock = threading.Lock()
+        self._reserved_slots = set()
+
+    def _reserve_slot(self):
+        """为新会话分配一个未被占用的配置子目录编号（session-N），返回 (编号, 目录)
+
+        编号在锁内分配，并行的工作线程不会拿到同一个目录；会话关闭时由 _release 归还。
+        """
+        with self._slot_lock:
+            index = 1
+            while index in self._reserved_slots:
+                index += 1
+            self._reserved_slots.add(index)
+        path = os.path.join(self.profile_dir, f"session-{index}")
+        os.makedirs(path, exist_ok=True)
+        return index, path
+
+    def _release(self, index):
+        with self._slot_lock:
+            self._reserved_slots.discard(index)
+
+    def _new_driver(self):
+        index, path = self._reserve_slot()
+        try:
+            driver = create_driver(self.options_factory(profile_dir=path))
+        except Exception:
+            self._release(index)
+            raise
+
+        # 会话可能在会话池中被直接 quit()（出错后丢弃），关闭时一并归还配置目录
+        quit_driver = driver.quit
+
+        def quit_and_release():
+            try:
+                quit_driver()
+            finally:
+                self._release(index)
+
+        driver.quit = quit_and_release
+        return driver
+
+    def _take_driver(self):
+        return self.idle_drivers.pop() if self.idle_drivers else self._new_driver()
+
+    def warm_up(self):
+        """启动第一个会话并停留在"搜搜"页面"""
+        with self._job_lock:
+            self._resolve([])
+        print(f"🔥 浏览器已预热，搜搜页面: {self.frame_url or '（当前页面）'}")
+
+    def _resolve(self, provinces):
+        """在一个会话中解析 iframe 地址和尚未缓存的省份地址，会话随后放回空闲列表"""
+        missing = [p for p in provinces if p not in self.province_links]
+        if self._frame_resolved and not missing:
+            return
+
+        driver = self._take_driver()
+        try:
+            if not self._frame_resolved:
+                self.frame_url = open_search_frame(driver)
+                self._frame_resolved = True
+            elif self.frame_url:
+                driver.get(self.frame_url)
+                wait_for_document_ready(driver)
+            else:
+                open_search_frame(driver)
+            self.province_links.update(resolve_province_links(driver, missing))
+        except Exception:
+            self._frame_resolved = False
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            raise
+        self.idle_drivers.append(driver)
+
+    def fetch_provinces(self, provinces, on_result=None):
+        with self._job_lock:
+            self._resolve(provinces)
+            results = scrape_provinces(
+                provinces,
+                self._new_driver,
+                frame_url=self.frame_url,
+                province_links=self.province_links,
+                pool_size=self.pool_size,
+                on_result=on_result,
+                idle_drivers=self.idle_drivers,
+            )
+            # 失败的省份下次重新解析地址（页面结构可能变了）
+            for province, text in results.items():
+                if text is None:
+                    self.province_links.pop(province, None)
+            return results
+
+    def close(self):
+        with self._job_lock:
+            while self.idle_drivers:
+                try:
+                    self.idle_drivers.pop().quit()
+                except Exception:
+                    pass
+
+
+class _ServiceHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+                command = request.get("command")
+                if command == "ping":
+                    response = {"ok": True, "idle_sessions": len(self.server.service.idle_drivers)}
+                elif command == "fetch":
+                    results = self.server.service.fetch_provinces(request.get("provinces") or [])
+                    response = {"ok": True, "results": results}
+                elif command == "stop":
+                    response = {"ok": True}
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    response = {"ok": False, "error": f"未知命令: {command}"}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _ServiceServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, service):
+        super().__init__(address, _ServiceHandler)
+        self.service = service
+
+
+def serve(address=SERVICE_ADDRESS, service=None):
+    """启动服务并阻塞，直到收到 stop 命令或 Ctrl+C"""
+    service = service or BrowserService()
+    service.warm_up()
+    server = _ServiceServer(parse_address(address), service)
+    host, port = server.server_address[:2]
+    print(f"🛰️  浏览器服务已启动: {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        print("🛑 浏览器服务已关闭")
+
+
+class BrowserServiceClient:
+    """把抓取任务交给常驻浏览器服务的抓取后端，接口与 SeleniumFetcher 相同"""
+
+    name = "service"
+
+    def __init__(self, address=SERVICE_ADDRESS):
+        self.address = parse_address(address)
+
+    def request(self, payload, timeout=None):
+        with socket.create_connection(self.address, timeout=timeout) as connection:
+            connection.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            with connection.makefile("rb") as reader:
+                line = reader.readline()
+        if not line:
+            raise ConnectionError("浏览器服务没有响应")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(f"浏览器服务出错: {response.get('error')}")
+        return response
+
+    def ping(self):
+        """服务可用时返回 True"""
+        try:
+            self.request({"command": "ping"}, timeout=PING_TIMEOUT)
+            return True
+        except (OSError, ValueError, RuntimeError):
+            return False
+
+    def fetch_provinces(self, provinces, on_result=None):
+        print(f"🛰️  交给浏览器服务抓取 {len(provinces)} 个省份...")
+        results = self.request({"command": "fetch", "provinces": list(provinces)})["results"]
+        if on_result:
+            for province in provinces:
+                on_result(province, results.get(province))
+        return {province: results.get(province) for province in provinces}
+
+    def stop(self):
+        self.request({"command": "stop"}, timeout=PING_TIMEOUT)
+
+    def close(self):
+        pass
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else ""
+    if command == "serve":
+        serve(args[1] if len(args) > 1 else SERVICE_ADDRESS)
+    elif command == "fetch" and len(args) > 1:
+        for province, text in BrowserServiceClient().fetch_provinces(args[1:]).items():
+            print(f"# ====== {province} ======")
+            print(text if text is not None else "# 抓取失败")
+    elif command == "stop":
+        BrowserServiceClient().stop()
+        print("🛑 已通知浏览器服务关闭")
+    else:
+        print("用法: python pl10000/browser_service.py serve [host:port] | fetch <省份> [...] | stop")
+
+
+if __name__ == "__main__":
+    main()
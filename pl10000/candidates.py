@@ -0,0 +1,92 @@
+"""每个频道保留多个候选地址，按评分排序后作为有序的备用源输出
+
+同一频道通常能抓到多个地址（jsdxudpy.txt 中 CCTV 频道常有 5 个以上）。
+只保留一个地址时，它一旦失效就要等到下一次抓取才能恢复；保留前几个
+评分最高的地址并依次写入输出后，播放器可以直接切换到下一个可用的源。
+
+评分综合流信息和探测结果：存活状态优先，其次分辨率、帧率，最后是实测的吞吐量和首字节时间，
+这样同一频道的高清源会排在前面，而不是取决于抓取到的先后顺序。
+
+备用地址优先选择与主地址不同的主机：同一代理主机挂掉时，它上面的地址会一起失效。
+"""
+import os
+from urllib.parse import urlsplit
+
+from stream_url import stream_key
+
+# 每个频道最多保留的地址数（主地址 + 备用地址）
+MAX_CANDIDATES = max(1, int(os.environ.get("SCRAPE_MAX_CANDIDATES", "3")))
+
+
+def host_of(url):
+    """返回地址的 host:port"""
+    return urlsplit(url).netloc.lower()
+
+
+def add_candidate(candidates, name, url):
+    """把地址加入 {频道名: [地址...]}，同一频道的重复地址只保留第一次出现的位置"""
+    urls = candidates.setdefault(name, [])
+    if url not in urls:
+        urls.append(url)
+    return urls
+
+
+def rank_candidates(urls, score=None, limit=MAX_CANDIDATES):
+    """去重（同一代理上的同一组播组只保留第一个地址）并按评分排序，最多返回 limit 个地址
+
+    score(地址) 返回排序键（越小越好），返回None表示剔除该地址；
+    不提供 score 时保持地址出现的顺序。评分相同的地址也保持原顺序。
+    截断时每个主机先取排名最高的一个地址，名额有剩余时再按排名补充同一主机的其他地址。
+    """
+    unique = {}
+    for url in urls:
+        unique.setdefault(stream_key(url), url)
+    ranked = list(unique.values())
+    if score is not None:
+        keyed = [(key, url) for url, key in ((url, score(url)) for url in ranked) if key is not None]
+        ranked = [url for _, url in sorted(keyed, key=lambda item: item[0])]
+
+    limit = max(1, limit)
+    if len(ranked) <= limit:
+        return ranked
+    hosts = set()
+    chosen = set()
+    for url in ranked:
+        host = host_of(url)
+        if host not in hosts:
+            hosts.add(host)
+            chosen.add(url)
+            if len(chosen) == limit:
+                break
+    for url in ranked:
+        if len(chosen) == limit:
+            break
+        chosen.add(url)
+    return [url for url in ranked if url in chosen]
+
+
+def quality_score(streams, score=None):
+    """按流信息（分辨率、帧率）排序的评分函数，streams 为 {地址: StreamInfo}
+
+    提供 score（如探测评分，排序键第一项为存活状态）时，先按存活状态分层，
+    分辨率和帧率相同的再按 score 的其余项（吞吐量、首字节时间）排序；score 返回None的地址剔除。
+    """
+    def combined(url):
+        base = score(url) if score is not None else ()
+        if base is None:
+            return None
+        info = streams.get(url)
+        quality = info.quality_key() if info is not None else (0, 0)
+        return tuple(base[:1]) + quality + tuple(base[1:])
+
+    return combined
+
+
+def rank_all(candidates, score=None, limit=MAX_CANDIDATES):
+    """对 {频道名: [地址...]} 中的每个频道排序，剔除没有剩余地址的频道"""
+    ranked = {}
+    for name, urls in candidates.items():
+        urls = rank_candidates(urls, score, limit)
+        if urls:
+            ranked[name] = urls
+    return ranked
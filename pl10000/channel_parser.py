@@ -0,0 +1,115 @@
+"""逐行流式解析频道列表
+
+输入可以是页面文本或打开的文件，按行增量读取，逐条产出
+(频道名, 地址, 附加字段) 记录，不会对整段文本做 split 复制，
+解析多兆字节的汇总列表（如 jsdxudpy.txt）时内存占用保持平稳。
+
+地址之后的附加字段（如 ",1920x1080,25"）可以用 StreamInfo 解析为分辨率和帧率。
+产出的地址已经规范化（修复嵌套地址，见 stream_url.py）。
+"""
+import re
+
+from stream_url import normalize_url
+
+# 频道地址支持的协议
+STREAM_SCHEMES = ('rtp://', 'udp://', 'http://', 'https://')
+
+_LINE_PATTERN = re.compile(r'[^\r\n]+')
+
+# 附加字段中的分辨率（1920x1080）和帧率（25、50fps、29.97）
+_RESOLUTION_PATTERN = re.compile(r'(\d{2,5})\s*[x×*]\s*(\d{2,5})', re.IGNORECASE)
+_FPS_PATTERN = re.compile(r'(\d{1,3}(?:\.\d+)?)\s*(?:fps|帧)?', re.IGNORECASE)
+
+
+class StreamInfo:
+    """从附加字段解析出的流信息，字段缺失时为None"""
+
+    __slots__ = ("width", "height", "fps")
+
+    def __init__(self, width=None, height=None, fps=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+    @classmethod
+    def from_fields(cls, extra_fields):
+        """解析 ("1920x1080", "25") 这样的附加字段，无法识别的字段忽略"""
+        info = cls()
+        for field in extra_fields:
+            resolution = _RESOLUTION_PATTERN.fullmatch(field)
+            if resolution:
+                info.width, info.height = int(resolution.group(1)), int(resolution.group(2))
+                continue
+            fps = _FPS_PATTERN.fullmatch(field)
+            if fps:
+                info.fps = float(fps.group(1))
+        return info
+
+    @property
+    def pixels(self):
+        if self.width is None or self.height is None:
+            return 0
+        return self.width * self.height
+
+    def quality_key(self):
+        """排序键：分辨率高、帧率高的在前，没有信息的排在最后"""
+        return (-self.pixels, -(self.fps or 0))
+
+    def to_fields(self):
+        """还原为附加字段元组"""
+        fields = []
+        if self.pixels:
+            fields.append(f"{self.width}x{self.height}")
+        if self.fps:
+            fields.append(f"{self.fps:g}")
+        return tuple(fields)
+
+    def __repr__(self):
+        return f"<StreamInfo {','.join(self.to_fields()) or '-'}>"
+
+
+def iter_lines(source):
+    """逐行产出（不含换行符）。source 为字符串时按需定位每一行，为文件或可迭代对象时逐行读取"""
+    if isinstance(source, str):
+        for match in _LINE_PATTERN.finditer(source):
+            yield match.group()
+    else:
+        for line in source:
+            yield line.rstrip('\r\n')
+
+
+def iter_channel_records(source, schemes=None):
+    """逐条产出 (频道名, 地址, 附加字段元组)
+
+    跳过空行和 # 开头的注释行；"名称,地址,1920x1080,25" 中地址之后的部分作为附加字段。
+    指定 schemes 时只产出地址以这些协议开头的记录。
+    """
+    for raw_line in iter_lines(source):
+        line = raw_line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        name, separator, rest = line.partition(',')
+        if not separator:
+            continue
+
+        fields = rest.split(',')
+        url = normalize_url(fields[0])
+        if schemes and not url.startswith(schemes):
+            continue
+
+        yield name.strip(), url, tuple(field.strip() for field in fields[1:])
+
+
+def parse_channel_line(line, schemes=None):
+    """解析单条 "频道名,地址,附加字段..." 行，返回 (频道名, 地址, StreamInfo)，不是频道行时返回None"""
+    for name, url, extra_fields in iter_channel_records((line,), schemes):
+        return name, url, StreamInfo.from_fields(extra_fields)
+    return None
+
+
+def join_fields(url, extra_fields):
+    """把地址和附加字段还原成逗号分隔的原始写法"""
+    if not extra_fields:
+        return url
+    return ','.join((url,) + tuple(extra_fields))
@@ -0,0 +1,89 @@
+"""频道分类：一条预编译的组合正则，每行只扫描一次即可得到规范频道名
+
+分类结果为 (类别, 规范名)：
+- ("cctv", "CCTV1") … ("cctv", "CCTV15")：CCTV-1综合、央视5 等统一为 CCTV+编号
+- ("local", 原名)：苏州地方台
+- ("satellite", 原名)：各卫视（命中别名时为规范名）
+
+CCTV 编号范围、前缀、别名和关键字来自 targets.json（见 targets.py）。
+"""
+import re
+from functools import lru_cache
+
+
+class ChannelClassifier:
+    """按抓取目标配置编译的分类器"""
+
+    def __init__(self, cctv_numbers, cctv_prefixes=("CCTV", "央视"), satellite_keywords=("卫视",),
+                 local_keywords=(), aliases=None):
+        self.aliases = {alias.lower(): result for alias, result in (aliases or {}).items()}
+
+        def alternation(words):
+            # 长的放前面，保证同一位置优先匹配更完整的词
+            return "|".join(re.escape(str(word)) for word in sorted(set(words), key=lambda w: (-len(str(w)), str(w))))
+
+        # 编号后不能紧跟数字、K 或 +，避免 CCTV16 被当作 CCTV1、CCTV4K/CCTV5+ 被当作 CCTV4/CCTV5
+        parts = []
+        if cctv_numbers and cctv_prefixes:
+            parts.append(rf'(?:{alternation(cctv_prefixes)})[- ]?(?P<number>{alternation(cctv_numbers)})(?![\dKk+])')
+        if self.aliases:
+            parts.append(rf'(?P<alias>{alternation(self.aliases)})')
+        if satellite_keywords:
+            parts.append(rf'(?P<satellite>{alternation(satellite_keywords)})')
+        if local_keywords:
+            parts.append(rf'(?P<local>{alternation(local_keywords)})')
+        self.pattern = re.compile("|".join(parts) or r'(?!)', re.IGNORECASE)
+
+    def classify(self, name):
+        """返回 (类别, 规范名)，不属于 CCTV、卫视或地方台时返回None"""
+        number = None
+        satellite_name = None
+        is_satellite = False
+        is_local = False
+        for match in self.pattern.finditer(name):
+            groups = match.groupdict()
+            if groups.get('number'):
+                number = groups['number']
+                break
+            if groups.get('alias'):
+                category, canonical = self.aliases[groups['alias'].lower()]
+                if category == "cctv":
+                    return category, canonical
+                satellite_name = canonical
+            elif groups.get('satellite'):
+                is_satellite = True
+            else:
+                is_local = True
+
+        if number:
+            return "cctv", f"CCTV{int(number)}"
+        if is_local:
+            return "local", name
+        if satellite_name:
+            return "satellite", satellite_name
+        if is_satellite:
+            return "satellite", name
+        return None
+
+
+@lru_cache(maxsize=None)
+def default_classifier():
+    """按默认配置文件编译的分类器"""
+    # targets 依赖本模块，这里延迟导入避免循环依赖
+    from targets import load_targets
+
+    return load_targets().classifier
+
+
+def classify_channel(name):
+    """返回 (类别, 规范名)，不属于CCTV1-15、卫视或地方台时返回None"""
+    return default_classifier().classify(name)
+
+
+@lru_cache(maxsize=None)
+def substring_matcher(targets):
+    """把一组目标名称编译成一个正则（按元组缓存），search 命中即表示包含其中任一名称"""
+    # 长的放前面，保证同一位置优先匹配更完整的名称
+    ordered = sorted(set(targets), key=len, reverse=True)
+    return re.compile('|'.join(re.escape(target) for target in ordered))
+
@@ -0,0 +1,330 @@
+"""XMLTV 节目单：流式解析并按频道建立紧凑的时间索引
+
+生成的 m3u 把播放器指向 EPG_URL（epg.51zmt.top），几百个频道的 XMLTV 文件有几十兆。
+这里用 iterparse 逐个元素解析，每处理完一个 <channel>/<programme> 就清空，解析时的内存占用与文件大小无关：
+- <channel> 的 id 和 display-name 经分类器映射到规范频道（CCTV1…、卫视规范名，与 m3u 的 tvg-name 一致）
+- <programme> 按频道存入 ChannelSchedule：开始、结束时间是 array('q')，节目名去重后只存编号，
+  解析完按开始时间排序，"正在播放/下一个"和时间段查询都用二分查找
+- 只需要部分频道时指定 channels，其他频道的节目直接丢弃；since/until 可以丢弃时间窗口之外的节目
+- 支持本地文件、http(s) 地址和 gzip 压缩（按文件头识别）
+
+不联网时可以先生成合成的节目单再查询：
+    python pl10000/epg.py sample /tmp/epg.xml.gz 7
+    python pl10000/epg.py now /tmp/epg.xml.gz CCTV1 江苏卫视
+"""
+import calendar
+import contextlib
+import gzip
+import io
+import os
+import sys
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from playlist import EPG_URL
+from targets import load_targets
+
+# 节目单来源（本地文件或地址）
+EPG_SOURCE = os.environ.get("SCRAPE_EPG", EPG_URL)
+
+EPG_TIMEOUT = float(os.environ.get("SCRAPE_EPG_TIMEOUT", "30"))
+
+
+@lru_cache(maxsize=4096)
+def _day_start(date, offset):
+    """某一天（YYYYMMDD）在该时区零点的时间戳；同一天的节目很多，按天缓存"""
+    timestamp = calendar.timegm((int(date[0:4]), int(date[4:6]), int(date[6:8]), 0, 0, 0))
+    if len(offset) == 5 and offset[0] in "+-":
+        seconds = int(offset[1:3]) * 3600 + int(offset[3:5]) * 60
+        timestamp -= seconds if offset[0] == "+" else -seconds
+    return timestamp
+
+
+def parse_xmltv_time(value):
+    """解析 XMLTV 时间（"20240101120000 +0800"，秒和时区可省略，省略时区时按UTC），返回Unix时间戳"""
+    digits, _, offset = value.strip().partition(" ")
+    if len(digits) < 8 or not digits.isdigit():
+        raise ValueError(f"无法识别的 XMLTV 时间: {value!r}")
+    digits = digits.ljust(14, "0")
+    return (_day_start(digits[:8], offset.strip())
+            + int(digits[8:10]) * 3600 + int(digits[10:12]) * 60 + int(digits[12:14]))
+
+
+def format_xmltv_time(timestamp, offset=8 * 3600):
+    """把时间戳格式化为 XMLTV 时间（默认东八区）"""
+    sign = "+" if offset >= 0 else "-"
+    local = time.gmtime(timestamp + offset)
+    return time.strftime("%Y%m%d%H%M%S", local) + f" {sign}{abs(offset) // 3600:02d}{abs(offset) % 3600 // 60:02d}"
+
+
+class Programme:
+    """查询结果中的一个节目"""
+
+    __slots__ = ("channel", "start", "stop", "title")
+
+    def __init__(self, channel, start, stop, title):
+        self.channel = channel
+        self.start = start
+        self.stop = stop
+        self.title = title
+
+    def __repr__(self):
+        return f"<Programme {self.channel} {format_xmltv_time(self.start)} {self.title}>"
+
+
+class ChannelSchedule:
+    """一个频道的节目：开始/结束时间和节目名编号分别存放在数组中，按开始时间排序"""
+
+    __slots__ = ("channel", "starts", "stops", "title_ids", "_titles", "_sorted")
+
+    def __init__(self, channel, titles):
+        self.channel = channel
+        self.starts = array("q")
+        self.stops = array("q")
+        self.title_ids = array("l")
+        self._titles = titles
+        self._sorted = True
+
+    def append(self, start, stop, title_id):
+        if self.starts and start < self.starts[-1]:
+            self._sorted = False
+        self.starts.append(start)
+        self.stops.append(stop)
+        self.title_ids.append(title_id)
+
+    def finish(self):
+        """解析结束后排序（XMLTV 通常已按时间排列，这时不需要重排）"""
+        if self._sorted:
+            return
+        order = sorted(range(len(self.starts)), key=self.starts.__getitem__)
+        self.starts = array("q", (self.starts[i] for i in order))
+        self.stops = array("q", (self.stops[i] for i in order))
+        self.title_ids = array("l", (self.title_ids[i] for i in order))
+        self._sorted = True
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _programme(self, i):
+        return Programme(self.channel, self.starts[i], self.stops[i], self._titles[self.title_ids[i]])
+
+    def at(self, timestamp):
+        """timestamp 时正在播放的节目，没有时返回None"""
+        i = bisect_right(self.starts, timestamp) - 1
+        if i >= 0 and self.stops[i] > timestamp:
+            return self._programme(i)
+        return None
+
+    def after(self, timestamp):
+        """timestamp 之后开始的第一个节目"""
+        i = bisect_right(self.starts, timestamp)
+        if i < len(self.starts):
+            return self._programme(i)
+        return None
+
+    def between(self, start, stop):
+        """与 [start, stop) 有重叠的节目，按开始时间排列"""
+        # 结束时间不一定单调，从 start 之前开始的那一个节目往后找
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        last = bisect_left(self.starts, stop)
+        return [self._programme(i) for i in range(first, last) if self.stops[i] > start]
+
+
+class EpgIndex:
+    """规范频道 -> ChannelSchedule；节目名在所有频道之间共用一份"""
+
+    def __init__(self, resolve=None):
+        self._resolve = resolve or (lambda name: name)
+        self._titles = []
+        self._title_ids = {}
+        self.schedules = {}
+
+    def key(self, name):
+        """频道名（tvg-name、显示名或别名）对应的规范频道"""
+        return self._resolve(name.strip())
+
+    def _title_id(self, title):
+        title_id = self._title_ids.get(title)
+        if title_id is None:
+            title_id = self._title_ids[title] = len(self._titles)
+            self._titles.append(title)
+        return title_id
+
+    def add(self, channel, start, stop, title):
+        schedule = self.schedules.get(channel)
+        if schedule is None:
+            schedule = self.schedules[channel] = ChannelSchedule(channel, self._titles)
+        schedule.append(start, stop, self._title_id(title))
+
+    def finish(self):
+        for schedule in self.schedules.values():
+            schedule.finish()
+        self._title_ids = {}  # 解析结束后不再需要反查
+        return self
+
+    def schedule(self, name):
+        return self.schedules.get(self.key(name))
+
+    def now(self, name, timestamp=None):
+        """正在播放的节目"""
+        schedule = self.schedule(name)
+        return schedule.at(time.time() if timestamp is None else timestamp) if schedule else None
+
+    def next(self, name, timestamp=None):
+        """下一个节目"""
+        schedule = self.schedule(name)
+        return schedule.after(time.time() if timestamp is None else timestamp) if schedule else None
+
+    def between(self, name, start, stop):
+        """时间段内的节目"""
+        schedule = self.schedule(name)
+        return schedule.between(start, stop) if schedule else []
+
+    def __len__(self):
+        return sum(len(schedule) for schedule in self.schedules.values())
+
+    def __contains__(self, name):
+        return self.key(name) in self.schedules
+
+
+def channel_resolver(targets=None):
+    """把频道名映射为规范频道：CCTV 为 CCTV+编号，卫视别名为规范名，其他为原名"""
+    classifier = (targets or load_targets()).classifier
+
+    def resolve(name):
+        result = classifier.classify(name)
+        return result[1] if result else name
+
+    return resolve
+
+
+@contextlib.contextmanager
+def open_xmltv(location, timeout=EPG_TIMEOUT):
+    """以二进制流打开本地文件或 http(s) 地址，gzip 压缩的内容自动解压"""
+    with contextlib.ExitStack() as stack:
+        if location.startswith(("http://", "https://")):
+            stream = stack.enter_context(urllib.request.urlopen(location, timeout=timeout))
+        else:
+            stream = stack.enter_context(open(location, "rb"))
+        stream = stack.enter_context(contextlib.closing(_peekable(stream)))
+        if stream.peek(2)[:2] == b"\x1f\x8b":
+            stream = stack.enter_context(gzip.GzipFile(fileobj=stream))
+        yield stream
+
+
+def _peekable(stream):
+    return stream if hasattr(stream, "peek") else io.BufferedReader(stream)
+
+
+def load_epg(source=EPG_SOURCE, channels=None, since=None, until=None, resolve=None):
+    """流式解析 XMLTV，返回 EpgIndex
+
+    channels 为规范频道名（或其别名）集合时只保留这些频道；since/until 为时间戳时丢弃完全在窗口之外的节目。
+    source 可以是本地路径、http(s) 地址或已打开的二进制文件。
+    """
+    index = EpgIndex(resolve or channel_resolver())
+    wanted = {index.key(name) for name in channels} if channels is not None else None
+    channel_keys = {}  # XMLTV 的 channel id -> 规范频道，None 表示不需要
+
+    def channel_key(channel_id):
+        if channel_id not in channel_keys:
+            key = index.key(channel_id)
+            channel_keys[channel_id] = key if wanted is None or key in wanted else None
+        return channel_keys[channel_id]
+
+    with contextlib.ExitStack() as stack:
+        stream = source if hasattr(source, "read") else stack.enter_context(open_xmltv(source))
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+        for event, element in context:
+            if event != "end":
+                continue
+            if element.tag == "channel":
+                # id 不一定是频道名（如 "1"），先用 display-name 识别
+                channel_id = element.get("id", "")
+                for display_name in element.iterfind("display-name"):
+                    key = index.key(display_name.text or "")
+                    if wanted is None or key in wanted:
+                        channel_keys[channel_id] = key
+                        break
+                root.clear()
+            elif element.tag == "programme":
+                key = channel_key(element.get("channel", ""))
+                if key is not None:
+                    try:
+                        start = parse_xmltv_time(element.get("start", ""))
+                        stop = parse_xmltv_time(element.get("stop") or element.get("start", ""))
+                    except ValueError:
+                        start = None
+                    if start is not None and (until is None or start < until) and (since is None or stop > since):
+                        index.add(key, start, stop, (element.findtext("title") or "").strip())
+                root.clear()
+    return index.finish()
+
+
+def write_sample(path, days=7, extra_channels=0, start=None, slot=1800):
+    """生成合成的 XMLTV 节目单（配置中的 CCTV、卫视，再加 extra_channels 个其他频道），path 以 .gz 结尾时压缩
+
+    用于不联网时验证解析和查询，也可以加大天数和频道数测试内存占用。
+    """
+    targets = load_targets()
+    names = [channel.id for channel in targets.cctv] + [channel.name for channel in targets.satellite]
+    names += [f"测试频道{i + 1}" for i in range(extra_channels)]
+    if start is None:
+        start = int(time.time()) // 86400 * 86400 - 8 * 3600  # 东八区当天零点
+    slots = days * 86400 // slot
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tv generator-info-name="pl10000">\n')
+        for number, name in enumerate(names, 1):
+            f.write(f'  <channel id="{number}"><display-name lang="zh">{escape(name)}</display-name></channel>\n')
+        for number, name in enumerate(names, 1):
+            for i in range(slots):
+                begin = start + i * slot
+                f.write(
+                    f'  <programme start="{format_xmltv_time(begin)}" stop="{format_xmltv_time(begin + slot)}" '
+                    f'channel="{number}"><title lang="zh">{escape(name)} 第{i % 48 + 1}档</title>'
+                    f'<desc lang="zh">{escape(name)}</desc></programme>\n'
+                )
+        f.write("</tv>\n")
+    return len(names) * slots
+
+
+def main(argv):
+    if len(argv) >= 2 and argv[0] == "sample":
+        days = int(argv[2]) if len(argv) > 2 else 7
+        extra = int(argv[3]) if len(argv) > 3 else 0
+        count = write_sample(argv[1], days, extra)
+        print(f"📝 已生成 {count} 个节目: {argv[1]}")
+        return 0
+
+    if argv and argv[0] == "now":
+        source = argv[1] if len(argv) > 1 else EPG_SOURCE
+        targets = load_targets()
+        names = argv[2:] or [channel.id for channel in targets.cctv] + [channel.name for channel in targets.satellite]
+        started = time.perf_counter()
+        index = load_epg(source, channels=names)
+        elapsed = time.perf_counter() - started
+        print(f"📺 {source}: {len(index.schedules)} 个频道，{len(index)} 个节目（解析 {elapsed:.2f} 秒）")
+        now = time.time()
+        for name in names:
+            current = index.now(name, now)
+            upcoming = index.next(name, now)
+            current_text = current.title if current else "-"
+            upcoming_text = f"{format_xmltv_time(upcoming.start)[8:12]} {upcoming.title}" if upcoming else "-"
+            print(f"  {name}: {current_text}  ▶ {upcoming_text}")
+        return 0
+
+    print("用法: python pl10000/epg.py sample 输出文件 [天数] [其他频道数]")
+    print("      python pl10000/epg.py now [节目单文件或地址] [频道...]")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
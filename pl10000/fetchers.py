@@ -0,0 +1,379 @@
+"""页面抓取后端
+
+- HttpFetcher：直接用HTTP请求读取"搜搜"页面和各省份页面，不启动浏览器
+- SeleniumFetcher：启动Chrome，按原流程点击并读取页面文本
+- AutoFetcher：优先HTTP；遇到验证（challenge）页面或HTTP拿不到的省份，再交给Selenium
+- 设置 SCRAPE_BROWSER_SERVICE 且常驻浏览器服务可用时，浏览器抓取交给服务完成（见 browser_service.py）
+- 设置 SCRAPE_SNAPSHOT 时录制或回放页面快照（见 snapshots.py）
+
+所有后端都提供 fetch_provinces(provinces, on_result=None)，返回 {省份: 页面文本}，
+失败的省份值为None，交给同一套 extract_valid_channels / extract_and_filter_channels 解析。
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+from browser import (
+    LANDING_URL,
+    SEARCH_FRAME_ID,
+    create_driver,
+    open_search_frame,
+    resolve_province_links,
+    save_debug_artifacts,
+)
+from browser_service import SERVICE_ADDRESS, BrowserServiceClient
+from perf import span, text_stats
+from province_pool import POOL_SIZE, scrape_provinces
+from snapshots import RECORDING, REPLAYING, SnapshotRecorder, SnapshotReplayer, capture_html
+
+# 抓取后端：auto（HTTP优先，必要时回退浏览器）、http、selenium
+BACKEND = os.environ.get("SCRAPE_BACKEND", "auto").lower()
+
+HTTP_TIMEOUT = float(os.environ.get("SCRAPE_HTTP_TIMEOUT", "15"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+# 出现这些特征说明拿到的是验证页面（免费空间的aes.js校验、Cloudflare等），需要真正的浏览器
+CHALLENGE_MARKERS = (
+    "aes.js",
+    "slowAES.decrypt",
+    "__test=",
+    "This site requires Javascript to work",
+    "cf-browser-verification",
+    "challenge-platform",
+    "Just a moment...",
+    "Checking your browser",
+)
+
+# 这些标签前后视为换行，近似浏览器中 body.text 的分行方式
+_BLOCK_TAGS = {
+    "br", "p", "div", "li", "ul", "ol", "tr", "table", "pre",
+    "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer",
+}
+_SKIP_TAGS = {"script", "style", "head", "title", "noscript", "template"}
+
+_URL_IN_SCRIPT = re.compile(r"""['"]((?:https?:)?//[^'"]+|[\w./-]+\.(?:html?|php)[^'"]*)['"]""")
+
+
+class FetchError(Exception):
+    """HTTP后端无法获取页面"""
+
+
+class ChallengeDetected(FetchError):
+    """页面被验证机制拦截，需要浏览器执行脚本"""
+
+
+def is_challenge_page(html):
+    """判断HTML是否是验证页面"""
+    return any(marker in html for marker in CHALLENGE_MARKERS)
+
+
+class _PageParser(HTMLParser):
+    """一次遍历同时收集：可见文本、链接、iframe 以及带 data-title 的元素"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self.links = []  # [(链接文本, href)]
+        self.iframes = {}  # {id: src}
+        self.titled = {}  # {data-title: 属性字典}
+        self._line = []
+        self._skip_depth = 0
+        self._link_href = None
+        self._link_text = []
+
+    def _break_line(self):
+        line = " ".join("".join(self._line).split())
+        if line:
+            self.lines.append(line)
+        self._line = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        if tag in _BLOCK_TAGS:
+            self._break_line()
+        if tag == "a":
+            self._link_href = attrs.get("href")
+            self._link_text = []
+        elif tag == "iframe":
+            self.iframes[attrs.get("id") or ""] = attrs.get("src")
+        if attrs.get("data-title"):
+            self.titled[attrs["data-title"]] = attrs
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in _SKIP_TAGS:
+            self._skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in _BLOCK_TAGS:
+            self._break_line()
+        if tag == "a" and self._link_href is not None:
+            self.links.append(("".join(self._link_text).strip(), self._link_href))
+            self._link_href = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self._line.append(data)
+        if self._link_href is not None:
+            self._link_text.append(data)
+
+    def close(self):
+        super().close()
+        self._break_line()
+
+
+def parse_page(html):
+    """解析HTML，返回收集结果"""
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def html_to_text(html):
+    """把HTML转换成与 body.text 近似的纯文本"""
+    return "\n".join(parse_page(html).lines)
+
+
+class HttpFetcher:
+    """基于连接池会话的HTTP抓取后端，iframe和各省份地址只解析一次"""
+
+    name = "http"
+
+    def __init__(self, landing_url=LANDING_URL, pool_size=POOL_SIZE, timeout=HTTP_TIMEOUT):
+        if requests is None:
+            raise FetchError("未安装requests，无法使用HTTP抓取")
+        self.landing_url = landing_url
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        self._frame_url = None
+        self._province_links = {}
+
+    def get_html(self, url):
+        """获取页面HTML，遇到验证页面时抛出 ChallengeDetected"""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise FetchError(f"请求 {url} 失败: {e}")
+        if not response.encoding or response.encoding.lower() == "iso-8859-1":
+            response.encoding = response.apparent_encoding
+        html = response.text
+        if is_challenge_page(html):
+            raise ChallengeDetected(f"{url} 返回了验证页面")
+        return html
+
+    def resolve_frame_url(self):
+        """从初始页面解析"搜搜"页面的地址"""
+        if self._frame_url:
+            return self._frame_url
+
+        with span("page.open", backend="http"):
+            page = parse_page(self.get_html(self.landing_url))
+        candidates = []
+        icon = page.titled.get("搜搜")
+        if icon:
+            for key in ("data-url", "data-src", "data-href", "href", "src"):
+                if icon.get(key):
+                    candidates.append(icon[key])
+            match = _URL_IN_SCRIPT.search(icon.get("onclick") or "")
+            if match:
+                candidates.append(match.group(1))
+        src = page.iframes.get(SEARCH_FRAME_ID)
+        if src and not src.startswith("about:"):
+            candidates.append(src)
+
+        if not candidates:
+            raise FetchError("初始页面中找不到'搜搜'页面的地址")
+        self._frame_url = urljoin(self.landing_url, candidates[0])
+        return self._frame_url
+
+    def resolve_province_links(self, provinces):
+        """从"搜搜"页面解析各省份按钮的地址，javascript/锚点链接记为None"""
+        missing = [p for p in provinces if p not in self._province_links]
+        if missing:
+            frame_url = self.resolve_frame_url()
+            links = {}
+            with span("frame.switch", backend="http"):
+                page = parse_page(self.get_html(frame_url))
+            for text, href in page.links:
+                links.setdefault(text, href)
+            for province in missing:
+                href = links.get(province)
+                if href and not href.startswith(("javascript:", "#")):
+                    self._province_links[province] = urljoin(frame_url, href)
+                else:
+                    self._province_links[province] = None
+        return {p: self._province_links[p] for p in provinces}
+
+    def fetch_province(self, province):
+        """获取单个省份的页面文本"""
+        url = self._province_links.get(province)
+        if not url:
+            raise FetchError(f"{province} 没有可直接访问的地址")
+        with span("province.load", province=province, backend="http") as load:
+            html = self.get_html(url)
+            text = html_to_text(html)
+            load.set(**text_stats(text))
+        capture_html(province, lambda: html)
+        return text
+
+    def fetch_provinces(self, provinces, on_result=None):
+        links = self.resolve_province_links(provinces)
+        results = {}
+
+        def fetch(province):
+            try:
+                return province, self.fetch_province(province)
+            except FetchError as e:
+                print(f"  ⚠️  HTTP获取 {province} 失败: {e}")
+                return province, None
+
+        targets = [p for p in provinces if links.get(p)]
+        for province in provinces:
+            if province not in targets:
+                results[province] = None
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, max(1, len(targets)))) as executor:
+            for province, text in executor.map(fetch, targets):
+                results[province] = text
+                if text is not None:
+                    print(f"  🌐 HTTP获取 {province} 成功")
+                if on_result:
+                    on_result(province, text)
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumFetcher:
+    """浏览器抓取后端，多省份时使用并行会话池"""
+
+    name = "selenium"
+
+    def __init__(self, options_factory, pool_size=POOL_SIZE, debug_dir=None):
+        self.options_factory = options_factory
+        self.pool_size = pool_size
+        self.debug_dir = debug_dir
+
+    def fetch_provinces(self, provinces, on_result=None):
+        driver = create_driver(self.options_factory())
+        try:
+            try:
+                frame_url = open_search_frame(driver)
+                province_links = resolve_province_links(driver, provinces)
+            except Exception:
+                if self.debug_dir:
+                    save_debug_artifacts(driver, self.debug_dir)
+                raise
+
+            print(f"🧵 使用 {min(self.pool_size, len(provinces))} 个浏览器会话并行抓取...")
+            return scrape_provinces(
+                provinces,
+                lambda: create_driver(self.options_factory()),
+                frame_url=frame_url,
+                province_links=province_links,
+                pool_size=self.pool_size,
+                seed_driver=driver,
+                on_result=on_result,
+            )
+        finally:
+            try:
+                driver.quit()
+                print("🛑 浏览器已关闭")
+            except Exception:
+                pass
+
+    def close(self):
+        pass
+
+
+class AutoFetcher:
+    """先用HTTP抓取；检测到验证页面时整体切换到浏览器，HTTP拿不到的省份也交给浏览器补抓"""
+
+    name = "auto"
+
+    def __init__(self, http_fetcher, selenium_fetcher):
+        self.http_fetcher = http_fetcher
+        self.selenium_fetcher = selenium_fetcher
+
+    def fetch_provinces(self, provinces, on_result=None):
+        results = {}
+
+        def on_http_result(province, text):
+            # 失败的省份稍后由浏览器补抓，这里只上报成功的结果
+            if text is not None and on_result:
+                on_result(province, text)
+
+        if self.http_fetcher is not None:
+            try:
+                results = self.http_fetcher.fetch_provinces(provinces, on_result=on_http_result)
+            except ChallengeDetected as e:
+                print(f"🛡️  {e}，改用浏览器抓取")
+            except FetchError as e:
+                print(f"⚠️  HTTP抓取不可用: {e}，改用浏览器抓取")
+
+        remaining = [p for p in provinces if results.get(p) is None]
+        if remaining:
+            results.update(self.selenium_fetcher.fetch_provinces(remaining, on_result=on_result))
+        return results
+
+    def close(self):
+        if self.http_fetcher is not None:
+            self.http_fetcher.close()
+
+
+def get_fetcher(options_factory, backend=BACKEND, debug_dir=None, service_address=SERVICE_ADDRESS):
+    """按配置创建抓取后端；SCRAPE_SNAPSHOT=replay 时回放快照，=record 时在抓取的同时录制快照"""
+    if REPLAYING:
+        print("📼 回放模式：使用录制的页面快照，不启动浏览器")
+        return SnapshotReplayer(html_to_text=html_to_text)
+    fetcher = _create_fetcher(options_factory, backend, debug_dir, service_address)
+    return SnapshotRecorder(fetcher) if RECORDING else fetcher
+
+
+def _create_fetcher(options_factory, backend, debug_dir, service_address):
+    selenium_fetcher = SeleniumFetcher(options_factory, debug_dir=debug_dir)
+    if service_address:
+        client = BrowserServiceClient(service_address)
+        if client.ping():
+            print(f"🛰️  使用常驻浏览器服务: {service_address}")
+            selenium_fetcher = client
+        else:
+            print(f"⚠️  浏览器服务 {service_address} 不可用，直接启动浏览器")
+    if backend == "selenium":
+        return selenium_fetcher
+
+    try:
+        http_fetcher = HttpFetcher()
+    except FetchError as e:
+        if backend == "http":
+            raise
+        print(f"⚠️  {e}，使用浏览器抓取")
+        return selenium_fetcher
+
+    if backend == "http":
+        return http_fetcher
+    return AutoFetcher(http_fetcher, selenium_fetcher)
@@ -0,0 +1,155 @@
+"""代理主机的健康记录与熔断（跨运行持久化，和省份缓存保存在同一个 SQLite 文件中）
+
+输出的地址集中在少数几个 udpxy/rtp 代理主机上，一个主机挂掉时指向它的所有频道会同时失效。
+每次探测后按主机记录：成功率、首字节时间的指数滑动平均（EWMA）、最后一次存活的时间。
+- 连续 HOST_FAILURE_THRESHOLD 次运行探测全部失败的主机打开熔断，冷却期内不再探测，
+  也不参与地址选择
+- 冷却期过后进入半开状态，允许再探测一次：成功则关闭熔断，失败则重新计时
+- 其余主机按成功率和延迟排序，评分相同的候选地址优先使用健康的主机
+"""
+import os
+import sqlite3
+import time
+
+from candidates import host_of
+from scrape_cache import CACHE_PATH
+
+# 连续失败多少次运行后打开熔断
+HOST_FAILURE_THRESHOLD = int(os.environ.get("SCRAPE_HOST_FAILURES", "3"))
+
+# 熔断冷却时间（秒），之后允许再探测一次
+HOST_COOLDOWN = float(os.environ.get("SCRAPE_HOST_COOLDOWN", str(6 * 3600)))
+
+# 延迟 EWMA 的平滑系数
+LATENCY_ALPHA = 0.3
+
+
+class HostHealth:
+    """单个主机的健康状态"""
+
+    __slots__ = ("host", "successes", "failures", "consecutive_failures", "latency", "last_alive", "opened_at")
+
+    def __init__(self, host, successes=0, failures=0, consecutive_failures=0, latency=None, last_alive=None, opened_at=None):
+        self.host = host
+        self.successes = successes
+        self.failures = failures
+        self.consecutive_failures = consecutive_failures
+        self.latency = latency
+        self.last_alive = last_alive
+        self.opened_at = opened_at
+
+    @property
+    def success_rate(self):
+        total = self.successes + self.failures
+        return self.successes / total if total else None
+
+    def is_open(self, now=None, cooldown=HOST_COOLDOWN):
+        """熔断是否打开（冷却期过后视为半开，允许再试一次）"""
+        if self.opened_at is None:
+            return False
+        return (now or time.time()) - self.opened_at < cooldown
+
+    def record(self, alive_count, dead_count, latency=None, now=None, threshold=HOST_FAILURE_THRESHOLD):
+        """记录一次运行中该主机的探测结果"""
+        now = now or time.time()
+        self.successes += alive_count
+        self.failures += dead_count
+        if alive_count:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.last_alive = now
+            if latency is not None:
+                self.latency = latency if self.latency is None else LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency
+        elif dead_count:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= threshold:
+                self.opened_at = now
+
+    def rank_key(self):
+        """排序键：成功率高、延迟低的在前，没有记录的主机排在有记录的健康主机之后"""
+        rate = self.success_rate
+        return (-(rate if rate is not None else 0.5), self.latency if self.latency is not None else float("inf"))
+
+    def __repr__(self):
+        rate = self.success_rate
+        state = "open" if self.is_open() else "closed"
+        return f"<HostHealth {self.host} {state} rate={'-' if rate is None else f'{rate:.0%}'} failures={self.consecutive_failures}>"
+
+
+class HostHealthRegistry:
+    """所有主机的健康记录，启动时全部读入内存，save() 时写回"""
+
+    def __init__(self, path=CACHE_PATH, cooldown=HOST_COOLDOWN):
+        self.path = path
+        self.cooldown = cooldown
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS host_health (
+                host TEXT PRIMARY KEY,
+                successes INTEGER NOT NULL,
+                failures INTEGER NOT NULL,
+                consecutive_failures INTEGER NOT NULL,
+                latency REAL,
+                last_alive REAL,
+                opened_at REAL
+            )"""
+        )
+        self.connection.commit()
+        self.hosts = {
+            row[0]: HostHealth(*row)
+            for row in self.connection.execute(
+                "SELECT host, successes, failures, consecutive_failures, latency, last_alive, opened_at FROM host_health"
+            )
+        }
+
+    def get(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = HostHealth(host)
+        return self.hosts[host]
+
+    def allows(self, url, now=None):
+        """地址所在的主机没有熔断时返回 True"""
+        health = self.hosts.get(host_of(url))
+        return health is None or not health.is_open(now, self.cooldown)
+
+    def open_hosts(self, now=None):
+        return [health for health in self.hosts.values() if health.is_open(now, self.cooldown)]
+
+    def record_results(self, results, now=None):
+        """按主机汇总一次探测的结果 {url: ProbeResult}；无法探测的协议不计入"""
+        by_host = {}
+        for url, result in results.items():
+            if result.alive is not None:
+                by_host.setdefault(host_of(url), []).append(result)
+
+        for host, host_results in by_host.items():
+            alive = [result for result in host_results if result.alive]
+            latency = min(result.ttfb for result in alive) if alive else None
+            self.get(host).record(len(alive), len(host_results) - len(alive), latency, now)
+        self.save()
+
+    def score(self, score=None):
+        """包装评分函数：熔断主机上的地址剔除，评分相同时按主机健康状况排序"""
+        def combined(url):
+            if not self.allows(url):
+                return None
+            base = score(url) if score is not None else ()
+            if base is None:
+                return None
+            host = host_of(url)
+            return tuple(base) + (self.hosts.get(host) or HostHealth(host)).rank_key()
+
+        return combined
+
+    def save(self):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO host_health VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (h.host, h.successes, h.failures, h.consecutive_failures, h.latency, h.last_alive, h.opened_at)
+                for h in self.hosts.values()
+            ],
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
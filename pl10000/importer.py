@@ -0,0 +1,190 @@
+"""多来源导入：把仓库中的静态列表、抓取结果和远程列表合并成一份候选频道
+
+仓库里有多份格式不同的列表，按内容自动识别格式：
+- szdxyw、zbhb-pl10000.txt 等："名称,地址"，# 开头的行和 ",#genre#" 分组行跳过
+- jsdxudpy.txt："名称,地址,1920x1080,25"，附加字段原样保留，组织输出时用于排序
+- zy.m3u、zbhb1-pl10000.m3u：#EXTINF 行（名称取逗号后的显示名，识别不了时再看 tvg-name）加下一行的地址
+
+每个来源可以是本地路径（相对于仓库根目录）或 http(s) 地址。多个来源在进程池中同时读取和解析，
+频道名按 targets.json 的别名表统一为输出名称（中央一套、CCTV1 都变成 CCTV-1综合），
+合并时同名频道的同一个流（见 stream_url.py）只保留第一次出现的行。
+
+    python pl10000/importer.py [来源...]    # 不指定来源时导入 scrape_ips_1 配置中的列表
+"""
+import os
+import re
+import sys
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from channel_parser import STREAM_SCHEMES, iter_channel_records, iter_lines, join_fields
+from perf import span
+from stream_url import normalize_url, stream_key
+from targets import load_targets
+
+# 是否导入配置中的其他列表（SCRAPE_IMPORTS=0 时只使用抓取结果）
+IMPORTS_ENABLED = os.environ.get("SCRAPE_IMPORTS", "1") == "1"
+
+# 导入进程数，0 为CPU核数；只有一个来源或进程数为1时在当前进程中读取
+IMPORT_WORKERS = int(os.environ.get("SCRAPE_IMPORT_WORKERS", "0")) or os.cpu_count() or 1
+
+# 读取远程列表的超时（秒）
+IMPORT_TIMEOUT = float(os.environ.get("SCRAPE_IMPORT_TIMEOUT", "15"))
+
+_M3U_ATTRIBUTE = re.compile(r'([\w-]+)="([^"]*)"')
+
+
+class ImportedSource:
+    """一个来源的导入结果：lines 为统一名称后的 "名称,地址,附加字段..." 行，读取失败时 error 为原因"""
+
+    __slots__ = ("source", "format", "lines", "error")
+
+    def __init__(self, source, format=None, lines=(), error=None):
+        self.source = source
+        self.format = format
+        self.lines = list(lines)
+        self.error = error
+
+    def __repr__(self):
+        if self.error:
+            return f"<ImportedSource {self.source} error={self.error!r}>"
+        return f"<ImportedSource {self.source} {self.format} lines={len(self.lines)}>"
+
+
+def sniff_format(text):
+    """按第一条非空行识别格式：m3u 或 txt（逗号分隔的频道行）"""
+    for line in iter_lines(text):
+        line = line.strip().lstrip('﻿')
+        if line:
+            return "m3u" if line.upper().startswith(("#EXTM3U", "#EXTINF")) else "txt"
+    return "txt"
+
+
+def iter_m3u_records(source):
+    """逐条产出 (显示名, tvg-name, 地址)，只保留 STREAM_SCHEMES 中的地址"""
+    display = tvg_name = None
+    for raw_line in iter_lines(source):
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line.upper().startswith("#EXTINF"):
+            info, _, display = line.rpartition(',')
+            tvg_name = dict(_M3U_ATTRIBUTE.findall(info)).get("tvg-name", "")
+            display = display.strip()
+            continue
+        if line.startswith('#') or display is None:
+            continue
+        url = normalize_url(line)
+        if url.startswith(STREAM_SCHEMES):
+            yield display, tvg_name, url
+        display = tvg_name = None
+
+
+def canonical_name(targets, *names):
+    """取第一个能识别的名称统一为输出名称；都识别不了时返回第一个非空名称"""
+    for name in names:
+        if name and targets.classifier.classify(name):
+            return targets.canonical_name(name)
+    return next((name for name in names if name), "")
+
+
+def parse_source(text):
+    """识别格式并解析，返回 (格式, 统一名称后的频道行)"""
+    targets = load_targets()
+    format = sniff_format(text)
+    if format == "m3u":
+        lines = [
+            f"{canonical_name(targets, display, tvg_name)},{url}"
+            for display, tvg_name, url in iter_m3u_records(text)
+        ]
+    else:
+        lines = [
+            f"{canonical_name(targets, name)},{join_fields(url, fields)}"
+            for name, url, fields in iter_channel_records(text, STREAM_SCHEMES)
+        ]
+    return format, [line for line in lines if not line.startswith(',')]
+
+
+def read_text(location, timeout=IMPORT_TIMEOUT):
+    """读取本地文件或 http(s) 地址的内容"""
+    if location.startswith(("http://", "https://")):
+        with urllib.request.urlopen(location, timeout=timeout) as response:
+            return response.read().decode("utf-8-sig", errors="replace")
+    with open(location, encoding="utf-8-sig", errors="replace") as f:
+        return f.read()
+
+
+def read_source(location):
+    """读取并解析一个来源（在导入进程中运行），失败时返回带 error 的结果而不是抛出异常"""
+    try:
+        format, lines = parse_source(read_text(location))
+    except (OSError, ValueError) as e:
+        return ImportedSource(location, error=str(e))
+    return ImportedSource(location, format, lines)
+
+
+def resolve_source(source, base_dir):
+    """远程地址原样返回，本地路径相对于 base_dir"""
+    if "://" in source:
+        return source
+    return os.path.join(base_dir, source)
+
+
+def read_sources(locations, workers=IMPORT_WORKERS):
+    """读取并解析所有来源，多个来源时在进程池中进行，返回与 locations 同序的 ImportedSource"""
+    workers = min(workers, len(locations))
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(read_source, locations))
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            print(f"⚠️  无法使用导入进程池（{e}），改为逐个读取")
+    return [read_source(location) for location in locations]
+
+
+def merge_lines(sources):
+    """按来源顺序合并频道行，同名频道的同一个流只保留第一次出现的行"""
+    seen = set()
+    merged = []
+    for source in sources:
+        for line in source.lines:
+            name, _, rest = line.partition(',')
+            key = (name, stream_key(rest.split(',', 1)[0]))
+            if key not in seen:
+                seen.add(key)
+                merged.append(line)
+    return merged
+
+
+def import_sources(sources, base_dir, workers=IMPORT_WORKERS):
+    """导入各来源并合并，返回 "名称,地址,附加字段..." 行；读取失败的来源跳过"""
+    if not sources:
+        return []
+    locations = [resolve_source(source, base_dir) for source in sources]
+    with span("import", sources=len(locations)) as importing:
+        results = read_sources(locations, workers)
+        for source, result in zip(sources, results):
+            if result.error:
+                print(f"  ⚠️  导入 {source} 失败: {result.error}")
+            else:
+                print(f"  📥 {source}（{result.format}）: {len(result.lines)} 条")
+        merged = merge_lines(results)
+        importing.set(lines=len(merged), failed=sum(1 for result in results if result.error))
+    return merged
+
+
+def main(argv):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sources = argv or load_targets().profile("scrape_ips_1").imports
+    if not sources:
+        print("没有要导入的列表")
+        return 1
+    lines = import_sources(sources, base_dir)
+    names = {line.partition(',')[0] for line in lines}
+    print(f"📦 合并后 {len(lines)} 条候选地址，{len(names)} 个频道")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
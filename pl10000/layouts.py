@@ -0,0 +1,369 @@
+"""频道的组织方式：抓取引擎（scrape_engine.py）按 targets.json 中配置的 layout 选用
+
+- ranked（scrape_ips）：只保留配置中的CCTV和卫视，页面上同一频道的每个流都作为候选地址，
+  按分辨率、帧率（启用探测时参考探测结果）排序；CCTV按编号、卫视按名称排列，最后是地方台
+- template（scrape_ips_1）：按配置中CCTV和卫视的顺序输出，找不到的频道保留占位；
+  匹配到但不在列表中的频道放在"其他频道"，最后是地方台
+
+每种组织方式提供：
+- parse(页面文本)：解析单个省份，结果可JSON序列化（写入省份缓存）
+- import_channels(来源, 仓库根目录)：导入其他列表（见 importer.py），结果与 parse 相同结构
+- candidate_urls(解析结果)：交给探测阶段的候选地址
+- collect(来源名称, 解析结果)：按来源顺序合并
+- playlist(探测结果, 主机健康记录)：组织成频道模型
+"""
+import re
+
+from candidates import add_candidate, quality_score, rank_all, rank_candidates
+from channel_parser import STREAM_SCHEMES, StreamInfo, iter_channel_records, join_fields, parse_channel_line
+from classifier import classify_channel, substring_matcher
+from importer import import_sources
+from perf import span
+from playlist import Channel, Playlist
+from prober import probe_score, select_candidates
+from stream_url import StreamIndex, stream_key
+from targets import load_targets
+
+
+def extract_and_filter_channels(text, profile):
+    """从页面文本中提取并过滤频道数据
+
+    返回 {频道名: [[地址, 附加字段...], ...]}，附加字段是解析后规范化的分辨率和帧率（如 "1920x1080", "25"）。
+    """
+    filtered_channels = {}
+    seen = {}  # 频道名 -> 已有的流（同一代理上的同一组播组只保留一个地址）
+
+    # 逐行流式解析，不复制整段文本
+    for channel_name, channel_url, extra_fields in iter_channel_records(text):
+        # 只处理带有 http/udp/rtp 地址的行
+        if 'http://' in channel_url or 'udp://' in channel_url or 'rtp://' in channel_url:
+            # 一次匹配完成分类：CCTV统一为CCTV+编号，卫视保留原名
+            result = classify_channel(channel_name)
+
+            # 只保留配置中的CCTV频道和卫视
+            if profile.accepts(result):
+                if seen.setdefault(result[1], StreamIndex()).add(channel_url):
+                    filtered_channels.setdefault(result[1], []).append(
+                        [channel_url, *StreamInfo.from_fields(extra_fields).to_fields()]
+                    )
+
+    return filtered_channels
+
+
+def get_base_channels():
+    """获取基础频道列表（CCTV + 卫视，见 targets.json）"""
+    targets = load_targets()
+    cctv_channels = [(channel.id, channel.name) for channel in targets.cctv]
+    tv_stations = [channel.name for channel in targets.satellite]
+    return cctv_channels, tv_stations
+
+
+def extract_valid_channels(text):
+    """从文本中提取有效的频道数据"""
+    valid_channels = []
+
+    # 逐行流式解析，跳过空行和注释行，只保留 rtp/udp/http/https 地址；
+    # 地址后的附加字段（分辨率、帧率）原样保留，组织输出时再解析用于排序
+    for channel_name, channel_url, extra_fields in iter_channel_records(text, STREAM_SCHEMES):
+        valid_channels.append(f"{channel_name},{join_fields(channel_url, extra_fields)}")
+
+    return valid_channels
+
+
+def remove_duplicate_channels(channels):
+    """去除重复的频道行（频道名称相同且是同一个流），同名的不同地址作为候选保留
+
+    同一代理上的同一组播组（/rtp/ 与 /udp/、嵌套写法等）视为同一个流，只保留第一次出现的行。
+    """
+    seen = set()
+    unique_channels = []
+
+    for channel in channels:
+        # 提取频道名称和地址
+        if ',' in channel:
+            name, _, rest = channel.partition(',')
+            key = (name.strip(), stream_key(rest.split(',', 1)[0]))
+            if key not in seen:
+                seen.add(key)
+                unique_channels.append(channel)
+
+    return unique_channels
+
+
+def filter_channels_by_type(channels, channel_list):
+    """根据频道列表过滤频道"""
+    # 所有目标名称预编译成一个正则，每行只扫描一次
+    matcher = substring_matcher(tuple(channel_list))
+    filtered = []
+    for channel in channels:
+        name = channel.split(',', 1)[0].strip()
+        if matcher.search(name):
+            filtered.append(channel)
+    return filtered
+
+
+def filter_target_channels(channels):
+    """从频道行中过滤出CCTV和卫视频道（编号、名称和别名都参与匹配）"""
+    targets = load_targets()
+    all_cctv_names = [key for keys in targets.cctv_keys() for key in keys]
+    all_tv_names = [key for keys in targets.satellite_keys() for key in keys]
+    return {
+        "cctv": filter_channels_by_type(channels, all_cctv_names),
+        "satellite": filter_channels_by_type(channels, all_tv_names),
+    }
+
+
+def index_matches(channels, key_groups):
+    """为每组关键字收集频道名包含其中任一关键字的所有频道行（忽略大小写），保持出现顺序
+
+    返回 {组序号: [频道行...]}。
+    """
+    index = {}
+    for channel in channels:
+        lowered = channel.split(',', 1)[0].strip().lower()
+        for group_index, keys in enumerate(key_groups):
+            if any(key in lowered for key in keys):
+                index.setdefault(group_index, []).append(channel)
+    return index
+
+
+def rank_channel(lines, score=None, health=None):
+    """把同一频道的多条行合并为一个频道，没有有效地址时返回None
+
+    地址后的分辨率、帧率解析为流信息，高清、高帧率的地址优先（启用探测时先剔除失效的地址，
+    再参考实测吞吐量）；提供主机健康记录时跳过熔断主机上的地址。
+    第一个地址为主地址，其余为备用地址，频道名取第一条行的名称。
+    """
+    name = None
+    streams = {}
+    for line in lines:
+        parsed = parse_channel_line(line)
+        if parsed:
+            if name is None:
+                name = parsed[0]
+            streams.setdefault(parsed[1], parsed[2])
+    ranking = quality_score(streams, score)
+    if health is not None:
+        ranking = health.score(ranking)
+    urls = rank_candidates(list(streams), ranking)
+    if not urls:
+        return None
+    return Channel(name, urls[0], backups=urls[1:])
+
+
+def build_playlist(collected_channels, cctv_channels, tv_stations, score=None, health=None, local=None):
+    """按模板顺序组织频道模型（CCTV、卫视、其他、地方台）
+
+    每个频道保留前几个候选地址（按分辨率、帧率和探测评分排序，跳过熔断主机），其余地址作为备用源输出。
+    local 为 {地方台名称: 地址}。
+    """
+    # 去重
+    unique_channels = remove_duplicate_channels(collected_channels)
+
+    # 关键字（编号、名称和配置中的别名）只转换一次小写，并编译成一个匹配器
+    targets = load_targets()
+    cctv_keys = [
+        tuple(key.lower() for key in (cctv_num, cctv_name, *targets.aliases_of(cctv_num)))
+        for cctv_num, cctv_name in cctv_channels
+    ]
+    tv_keys = [tuple(key.lower() for key in (tv, *targets.aliases_of(tv))) for tv in tv_stations]
+    cctv_matcher = substring_matcher(tuple(key for keys in cctv_keys for key in keys))
+    tv_matcher = substring_matcher(tuple(key for keys in tv_keys for key in keys))
+
+    # 按频道名称分为CCTV、卫视和其他频道；CCTV按规范编号归类到模板项，避免 CCTV10 被当作 CCTV1 的候选
+    cctv_numbers = {cctv_num: i for i, (cctv_num, _) in enumerate(cctv_channels)}
+    cctv_index = {}
+    tv_found = []
+    other_channels_filtered = []
+
+    for channel in unique_channels:
+        name = channel.split(',', 1)[0].strip()
+        lowered = name.lower()
+        if cctv_keys and cctv_matcher.search(lowered):
+            result = classify_channel(name)
+            if result and result[0] == "cctv" and result[1] in cctv_numbers:
+                cctv_index.setdefault(cctv_numbers[result[1]], []).append(channel)
+                continue
+        # 不是模板中CCTV频道的行（CCTV5+、CCTV4K、CCTV16 等）同样按卫视或其他频道处理，不能丢弃
+        if tv_keys and tv_matcher.search(lowered):
+            tv_found.append(channel)
+        else:
+            other_channels_filtered.append(channel)
+
+    tv_index = index_matches(tv_found, tv_keys)
+
+    playlist = Playlist()
+
+    # 添加CCTV频道，没有找到的添加占位符（但不写"待更新源"）
+    cctv_section = playlist.section("CCTV频道", "央视频道")
+    for i, (cctv_num, cctv_name) in enumerate(cctv_channels):
+        channel = rank_channel(cctv_index.get(i, []), score, health)
+        cctv_section.add(channel or Channel(cctv_name, tvg_name=cctv_num))
+
+    # 按卫视列表顺序添加
+    tv_section = playlist.section("卫视频道", "卫视频道")
+    for i, tv in enumerate(tv_stations):
+        channel = rank_channel(tv_index.get(i, []), score, health)
+        tv_section.add(channel or Channel(tv))
+
+    # 添加其他频道（如果有），同名的多条地址合并为一个频道
+    other_by_name = {}
+    for channel in other_channels_filtered:
+        other_by_name.setdefault(channel.split(',', 1)[0].strip(), []).append(channel)
+    other_found = [rank_channel(lines, score, health) for lines in other_by_name.values()]
+    other_found = [channel for channel in other_found if channel]
+    if other_found:
+        other_section = playlist.section("其他频道", "其他频道")
+        for channel in other_found:
+            other_section.add(channel)
+
+    # 添加地方台
+    local_section = playlist.section("苏州地方台", "地方频道")
+    for name, url in (local or {}).items():
+        local_section.add(Channel(name, url))
+
+    return playlist
+
+
+class RankedLayout:
+    """ranked：每个频道按质量排序的候选地址，CCTV按编号、卫视按名称排列"""
+
+    # 解析逻辑变化时递增（省份缓存的命名空间）
+    version = 4
+
+    # 出错时不写出部分结果，保留上次的列表
+    save_on_error = False
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.channels = {}  # 频道名 -> 候选地址列表
+        self.streams = {}  # 地址 -> 流信息（分辨率、帧率）
+
+    def parse(self, text):
+        return extract_and_filter_channels(text, self.profile)
+
+    def import_channels(self, sources, workspace_root):
+        return self.parse("\n".join(import_sources(sources, workspace_root)))
+
+    def candidate_urls(self, filtered):
+        return [record[0] for records in filtered.values() for record in records]
+
+    def collect(self, source, filtered):
+        """合并到总字典，保留各省份的所有候选地址"""
+        if not filtered:
+            print(f"  ⚠️  未从 {source} 提取到有效频道")
+            return
+        for name, records in filtered.items():
+            for url, *fields in records:
+                add_candidate(self.channels, name, url)
+                self.streams.setdefault(url, StreamInfo.from_fields(fields))
+        print(f"  ✅ 从 {source} 获取了 {len(filtered)} 个有效频道")
+
+    def playlist(self, probe_results=None, health=None):
+        # 每个频道保留前几个候选地址作为备用源，分辨率、帧率高的排在前面，熔断主机上的地址跳过；
+        # 启用探测（SCRAPE_PROBE=1）时剔除失效的源，并参考实测吞吐量
+        all_channels = self.channels
+        with span("select", candidates=sum(len(urls) for urls in all_channels.values())) as selecting:
+            if probe_results is not None and all_channels:
+                all_channels = select_candidates(all_channels, streams=self.streams, health=health, results=probe_results)
+            else:
+                ranking = quality_score(self.streams)
+                all_channels = rank_all(all_channels, health.score(ranking) if health is not None else ranking)
+            selecting.set(channels=len(all_channels))
+
+        print("📡 添加苏州地方台...")
+        local = self.profile.local
+        all_channels.update((name, [url]) for name, url in local.items())
+        print(f"  ✅ 添加了 {len(local)} 个苏州地方台")
+
+        print("📊 整理频道数据...")
+        with span("classify", channels=len(all_channels)):
+            # 分离CCTV、卫视和地方台
+            cctv_channels = {}
+            satellite_channels = {}
+            local_channels = {}
+            for name, urls in all_channels.items():
+                if name in local:
+                    local_channels[name] = urls
+                elif 'CCTV' in name.upper():
+                    cctv_channels[name] = urls
+                else:
+                    satellite_channels[name] = urls
+
+            # CCTV按数字排序，卫视和地方台按名称排序
+            sorted_cctv = sorted(
+                cctv_channels.items(),
+                key=lambda x: int(re.search(r'(\d+)', x[0].upper()).group(1)) if re.search(r'(\d+)', x[0].upper()) else 0
+            )
+            sorted_satellite = sorted(satellite_channels.items(), key=lambda x: x[0])
+            sorted_local = sorted(local_channels.items(), key=lambda x: x[0])
+
+        playlist = Playlist()
+        for title, group, channels in (
+            ("CCTV频道", "央视频道", sorted_cctv),
+            ("卫视频道", "卫视频道", sorted_satellite),
+            ("苏州地方台", "地方频道", sorted_local),
+        ):
+            section = playlist.section(title, group)
+            for name, urls in channels:
+                section.add(Channel(name, urls[0], backups=urls[1:]))
+        return playlist
+
+
+class TemplateLayout:
+    """template：按配置中的CCTV和卫视顺序输出，找不到的频道保留占位"""
+
+    version = 2
+
+    # 出错时也写出已收集的频道
+    save_on_error = True
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.lines = []  # 按来源顺序收集的 "名称,地址,附加字段..." 行
+
+    def parse(self, text):
+        # 提取有效频道，再过滤出CCTV和卫视频道
+        return filter_target_channels(extract_valid_channels(text))
+
+    def import_channels(self, sources, workspace_root):
+        return filter_target_channels(import_sources(sources, workspace_root))
+
+    def candidate_urls(self, parsed):
+        return [
+            channel[1]
+            for channel in map(parse_channel_line, parsed["cctv"] + parsed["satellite"])
+            if channel
+        ]
+
+    def collect(self, source, parsed):
+        print(f"📡 {source}:")
+        if parsed["cctv"]:
+            self.lines.extend(parsed["cctv"])
+            print(f"  ✅ 找到 {len(parsed['cctv'])} 个CCTV频道")
+        if parsed["satellite"]:
+            self.lines.extend(parsed["satellite"])
+            print(f"  ✅ 找到 {len(parsed['satellite'])} 个卫视频道")
+        if not parsed["cctv"] and not parsed["satellite"]:
+            print(f"  ⚠️  未在 {source} 中找到有效频道")
+
+    def playlist(self, probe_results=None, health=None):
+        # 按探测结果为每个频道的地址排序并剔除失效的源
+        score = probe_score(probe_results) if probe_results is not None else None
+        print("📡 添加苏州地方台...")
+        cctv_channels, tv_stations = get_base_channels()
+        with span("classify", lines=len(self.lines)) as classifying:
+            playlist = build_playlist(self.lines, cctv_channels, tv_stations, score, health, self.profile.local)
+            classifying.set(channels=sum(len(section.channels) for section in playlist.sections))
+        return playlist
+
+
+LAYOUTS = {"ranked": RankedLayout, "template": TemplateLayout}
+
+
+def get_layout(profile):
+    """按配置创建一次采集使用的组织方式（收集的频道保存在其中）"""
+    try:
+        return LAYOUTS[profile.layout](profile)
+    except KeyError:
+        raise ValueError(f"配置 {profile.name} 的 layout 未知: {profile.layout}（可选 {'、'.join(LAYOUTS)}）")
@@ -0,0 +1,125 @@
+"""输出文件的增量写入
+
+- 与上一次的文件做语义对比（新增/删除的频道、地址变化的频道）
+- 内容完全相同时不写文件，不同时先写临时文件再原子替换
+- 输出机器可读的变化摘要（JSON），在 GitHub Actions 中同时写入 $GITHUB_OUTPUT，
+  工作流据此在没有变化时跳过 git 步骤
+"""
+import json
+import os
+import tempfile
+import time
+
+from channel_parser import iter_channel_records
+from perf import span
+
+
+def read_text(path):
+    """读取已有文件，不存在时返回None"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write(path, content):
+    """写入临时文件后原子替换目标文件，避免中途失败留下半个文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件权限为 0600，改回普通文件的权限
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def channel_map(content):
+    """把 "频道名,地址" 格式的内容解析为 {频道名: [地址...]}，忽略注释和占位行"""
+    channels = {}
+    if content:
+        for name, url, _ in iter_channel_records(content):
+            if url and not url.startswith("#"):
+                channels.setdefault(name, []).append(url)
+    return channels
+
+
+def diff_channels(old_content, new_content):
+    """对比两份频道列表，返回新增、删除和地址变化的频道"""
+    old_channels = channel_map(old_content)
+    new_channels = channel_map(new_content)
+    return {
+        "added": [name for name in new_channels if name not in old_channels],
+        "removed": [name for name in old_channels if name not in new_channels],
+        "url_changed": [
+            {"name": name, "old": old_channels[name], "new": urls}
+            for name, urls in new_channels.items()
+            if name in old_channels and old_channels[name] != urls
+        ],
+    }
+
+
+def write_if_changed(path, content, previous=None):
+    """内容与现有文件不同时才原子写入，返回是否写入"""
+    if previous is None:
+        previous = read_text(path)
+    if previous == content:
+        return False
+    atomic_write(path, content)
+    return True
+
+
+def write_outputs(paths, content, semantic_diff=True):
+    """把同一份内容写到多个位置（主文件 + 备份），返回变化摘要
+
+    以第一个路径的现有内容作为"上一次"的结果做语义对比；
+    非 "频道名,地址" 格式的文件（m3u、json）传 semantic_diff=False 只比较内容是否变化。
+    """
+    with span("file.write", file=os.path.basename(paths[0])) as write:
+        previous = read_text(paths[0])
+        if semantic_diff:
+            changes = diff_channels(previous, content)
+        else:
+            changes = {"added": [], "removed": [], "url_changed": []}
+        written = [path for path in paths if write_if_changed(path, content, previous if path == paths[0] else None)]
+        write.set(bytes=len(content.encode("utf-8")), written=len(written))
+    return {
+        "file": os.path.basename(paths[0]),
+        "changed": bool(written),
+        "channels_changed": any(changes.values()) if semantic_diff else previous != content,
+        "written": written,
+        **changes,
+    }
+
+
+def publish_change_summary(summaries, summary_path):
+    """打印并保存变化摘要；在 GitHub Actions 中输出 changed=true/false"""
+    changed = any(summary["changed"] for summary in summaries)
+    report = {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "changed": changed, "files": summaries}
+    atomic_write(summary_path, json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+
+    for summary in summaries:
+        if not summary["changed"]:
+            print(f"⏸️  {summary['file']} 内容没有变化，跳过写入")
+            continue
+        print(
+            f"📝 {summary['file']} 已更新: 新增 {len(summary['added'])} 个频道，"
+            f"删除 {len(summary['removed'])} 个，地址变化 {len(summary['url_changed'])} 个"
+        )
+    print(f"🧾 变化摘要已保存到: {summary_path}")
+
+    github_output = os.environ.get("GITHUB_OUTPUT")
+    if github_output:
+        with open(github_output, "a", encoding="utf-8") as f:
+            f.write(f"changed={'true' if changed else 'false'}\n")
+    return report
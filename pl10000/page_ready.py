@@ -0,0 +1,114 @@
+"""页面就绪检测：用真实信号代替固定的 time.sleep 等待
+
+判断依据有三类：DOM 是否仍在变化（MutationObserver）、body 文本是否已稳定、
+频道列表（"名称,rtp://..." 之类的行）是否已经出现。条件满足立即返回，
+每种等待都有可配置的上限，超时后返回已拿到的内容而不是直接丢弃。
+"""
+import os
+import re
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+# 等待上限（秒），可通过环境变量调整
+PAGE_READY_TIMEOUT = float(os.environ.get("SCRAPE_PAGE_READY_TIMEOUT", "15"))
+CONTENT_TIMEOUT = float(os.environ.get("SCRAPE_CONTENT_TIMEOUT", "12"))
+CLICK_SETTLE_TIMEOUT = float(os.environ.get("SCRAPE_CLICK_SETTLE_TIMEOUT", "1"))
+
+# 完整加载页面（图片、样式、字体都加载，等待 load 事件），调试时设置 SCRAPE_FULL_PAGE_LOAD=1；
+# 默认为精简加载，DOM 解析完成（interactive）即视为文档就绪，内容是否到位由后面的等待判断
+FULL_PAGE_LOAD = os.environ.get("SCRAPE_FULL_PAGE_LOAD", "0") == "1"
+READY_STATES = ("complete",) if FULL_PAGE_LOAD else ("interactive", "complete")
+
+# DOM 连续多久没有变化视为渲染完成（秒）
+DOM_QUIET_PERIOD = float(os.environ.get("SCRAPE_DOM_QUIET", "0.4"))
+
+# 轮询间隔（秒）
+POLL_INTERVAL = 0.1
+
+# 一行 "频道名,地址" 即视为频道列表已出现
+CHANNEL_LINE_PATTERN = re.compile(r'^[^,\n]+,\s*(?:rtp|udp|https?)://', re.IGNORECASE | re.MULTILINE)
+
+# 在当前文档中安装 MutationObserver，返回距最近一次 DOM 变化的毫秒数；
+# 文档被替换（导航）后观察者随之消失，下次调用会重新安装并从零计时
+_MUTATION_PROBE_JS = """
+if (!window.__scrapeObserver && document.documentElement) {
+    window.__scrapeLastMutation = Date.now();
+    window.__scrapeObserver = new MutationObserver(function () {
+        window.__scrapeLastMutation = Date.now();
+    });
+    window.__scrapeObserver.observe(document.documentElement, {
+        childList: true, subtree: true, characterData: true
+    });
+}
+return Date.now() - (window.__scrapeLastMutation || 0);
+"""
+
+
+def get_body_text(driver):
+    """读取当前文档的 body 文本，页面切换中读取失败时返回空字符串"""
+    try:
+        return driver.find_element(By.TAG_NAME, "body").text
+    except WebDriverException:
+        return ""
+
+
+def dom_quiet_for(driver):
+    """返回 DOM 已保持静止的秒数"""
+    try:
+        elapsed = driver.execute_script(_MUTATION_PROBE_JS)
+    except WebDriverException:
+        return 0.0
+    return (elapsed or 0) / 1000.0
+
+
+def has_channel_lines(text):
+    """文本中是否已出现频道列表"""
+    return bool(text) and CHANNEL_LINE_PATTERN.search(text) is not None
+
+
+def wait_for_document_ready(driver, timeout=PAGE_READY_TIMEOUT, states=READY_STATES):
+    """等待 document.readyState 进入 states 之一，返回是否在上限内就绪"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if driver.execute_script("return document.readyState") in states:
+                return True
+        except WebDriverException:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+def wait_for_dom_quiet(driver, quiet=DOM_QUIET_PERIOD, timeout=CLICK_SETTLE_TIMEOUT):
+    """等待 DOM 连续 quiet 秒没有变化，返回是否在上限内静止"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if dom_quiet_for(driver) >= quiet:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+def wait_for_channels(driver, previous_text=None, timeout=CONTENT_TIMEOUT, quiet=DOM_QUIET_PERIOD):
+    """等待频道列表出现并稳定，返回 body 文本
+
+    满足以下条件即返回：文本与 previous_text 不同（避免读到上一个省份的旧内容）、
+    包含频道行、与上一次轮询结果一致，并且 DOM 已静止 quiet 秒。
+    超时后返回最后一次读到的文本，由调用方照常解析，不丢弃已加载的数据。
+    """
+    deadline = time.monotonic() + timeout
+    last_text = None
+    while True:
+        text = get_body_text(driver)
+        if text != previous_text and has_channel_lines(text):
+            if text == last_text and dom_quiet_for(driver) >= quiet:
+                return text
+        last_text = text
+        if time.monotonic() >= deadline:
+            print(f"  ⏱️  等待频道列表超时（{timeout:.0f} 秒），使用当前已加载的内容")
+            return text
+        time.sleep(POLL_INTERVAL)
@@ -0,0 +1,205 @@
+"""运行耗时统计：为主流程的各个阶段计时，打印汇总表并保存 JSON 报告
+
+    with span("province.load", province=province) as s:
+        text = ...
+        s.set(bytes=len(text.encode("utf-8")))
+
+每个计时段记录名称、开始时间、耗时、所在线程和附加数据（字节数、行数、频道数等）。
+报告中按名称汇总（次数、总耗时、平均、最大值，数值型附加数据求和），名称在各次运行之间保持稳定，
+可以直接对比两次运行的报告，判断变慢来自网站、浏览器还是解析：
+
+    python pl10000/perf.py 上一次.perf.json 这一次.perf.json
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# 是否记录和输出耗时统计
+PERF_ENABLED = os.environ.get("SCRAPE_PERF", "1") == "1"
+
+
+class Span:
+    """一个计时段"""
+
+    __slots__ = ("name", "start", "duration", "thread", "depth", "attrs")
+
+    def __init__(self, name, start, thread, depth, attrs):
+        self.name = name
+        self.start = start
+        self.duration = None
+        self.thread = thread
+        self.depth = depth
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """补充附加数据（字节数、行数、频道数等）"""
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "start": round(self.start, 4),
+            "duration": round(self.duration or 0.0, 4),
+            "thread": self.thread,
+            "depth": self.depth,
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+class PerfRecorder:
+    """收集一次运行中的所有计时段，多线程安全"""
+
+    def __init__(self, enabled=PERF_ENABLED):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        span = Span(name, time.perf_counter() - self._origin, threading.current_thread().name, len(stack), attrs)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - self._origin - span.start
+            stack.pop()
+            if self.enabled:
+                with self._lock:
+                    self.spans.append(span)
+
+    def phases(self):
+        """按名称汇总：{名称: {count, total, mean, max, 数值型附加数据之和...}}，按首次出现的顺序"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        phases = {}
+        for span in spans:
+            phase = phases.setdefault(span.name, {"count": 0, "total": 0.0, "max": 0.0})
+            phase["count"] += 1
+            phase["total"] += span.duration
+            phase["max"] = max(phase["max"], span.duration)
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    phase[key] = phase.get(key, 0) + value
+        for phase in phases.values():
+            phase["mean"] = phase["total"] / phase["count"]
+            for key in ("total", "max", "mean"):
+                phase[key] = round(phase[key], 4)
+        return phases
+
+    def report(self, **metadata):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started_at)),
+            "elapsed": round(time.perf_counter() - self._origin, 4),
+            **metadata,
+            "phases": self.phases(),
+            "spans": [span.to_dict() for span in spans],
+        }
+
+    def write_report(self, path, **metadata):
+        """保存 JSON 报告并打印汇总表"""
+        if not self.enabled:
+            return None
+        # output_writer 自身也会计时，这里延迟导入避免循环依赖
+        from output_writer import atomic_write
+
+        report = self.report(**metadata)
+        atomic_write(path, json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        print_summary(report)
+        print(f"⏱️  耗时报告已保存到: {path}")
+        return report
+
+
+def pad_display(text, width, right=False):
+    """按显示宽度补齐（中文字符占两列）"""
+    text = str(text)
+    fill = " " * max(0, width - len(text) - sum(1 for ch in text if ord(ch) > 0x2E80))
+    return fill + text if right else text + fill
+
+
+def _format_extra(phase):
+    return " ".join(
+        f"{key}={value:g}" if isinstance(value, float) else f"{key}={value}"
+        for key, value in phase.items()
+        if key not in ("count", "total", "max", "mean")
+    )
+
+
+def print_summary(report):
+    """打印按阶段汇总的耗时表"""
+    print(f"\n⏱️  耗时统计（总计 {report['elapsed']:.2f} 秒）:")
+    print("  " + pad_display("阶段", 24) + pad_display("次数", 6, True) + pad_display("总耗时", 10, True)
+          + pad_display("平均", 10, True) + pad_display("最大", 10, True) + "  附加数据")
+    for name, phase in report["phases"].items():
+        print(
+            "  " + pad_display(name, 24) + pad_display(phase["count"], 6, True)
+            + pad_display(f"{phase['total']:.3f}", 10, True) + pad_display(f"{phase['mean']:.3f}", 10, True) + pad_display(f"{phase['max']:.3f}", 10, True)
+            + "  " + _format_extra(phase)
+        )
+
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.3f}"
+
+
+def compare_reports(old, new):
+    """对比两次运行的报告，打印每个阶段总耗时的变化"""
+    print("  " + pad_display("阶段", 24) + pad_display("之前", 10, True) + pad_display("之后", 10, True)
+          + pad_display("变化", 10, True))
+    for name in dict.fromkeys(list(old["phases"]) + list(new["phases"])):
+        before = old["phases"].get(name, {}).get("total")
+        after = new["phases"].get(name, {}).get("total")
+        delta = "-" if before is None or after is None else f"{after - before:+.3f}"
+        print("  " + pad_display(name, 24) + pad_display(_seconds(before), 10, True)
+              + pad_display(_seconds(after), 10, True) + pad_display(delta, 10, True))
+    delta = f"{new['elapsed'] - old['elapsed']:+.3f}"
+    print("  " + pad_display("总计", 24) + pad_display(_seconds(old["elapsed"]), 10, True)
+          + pad_display(_seconds(new["elapsed"]), 10, True) + pad_display(delta, 10, True))
+
+
+# 进程内共享的记录器
+recorder = PerfRecorder()
+
+
+def span(name, **attrs):
+    """在全局记录器中计时一段代码"""
+    return recorder.span(name, **attrs)
+
+
+def text_stats(text):
+    """页面文本的字节数和行数，用作计时段的附加数据"""
+    if not text:
+        return {"bytes": 0, "lines": 0}
+    return {"bytes": len(text.encode("utf-8")), "lines": text.count("\n") + 1}
+
+
+def main():
+    paths = sys.argv[1:]
+    if len(paths) == 1:
+        with open(paths[0], encoding="utf-8") as f:
+            print_summary(json.load(f))
+    elif len(paths) == 2:
+        reports = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                reports.append(json.load(f))
+        compare_reports(*reports)
+    else:
+        print("用法: python pl10000/perf.py <报告.perf.json> [<另一份报告.perf.json>]")
+
+
+if __name__ == "__main__":
+    main()
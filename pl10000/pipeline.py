@@ -0,0 +1,201 @@
+"""抓取、解析、探测分阶段重叠执行的流水线
+
+以前要等所有省份都抓取完才开始解析，解析完才开始探测。流水线中三个阶段同时运行，之间用有界队列连接：
+
+- 抓取：抓取后端在工作线程中运行，每个省份完成时立即放入文本队列；队列满时抓取线程等待（背压），
+  已抓取但尚未解析的页面文本最多 QUEUE_SIZE 份
+- 解析：逐个取出页面文本，内容未变化时复用缓存的解析结果，否则在线程中解析；
+  解析出的候选地址立即交给探测阶段
+- 探测：收到候选地址就开始探测（并发上限由 StreamProber 控制），熔断的主机跳过，
+  同一代理上的同一组播组只探测一次
+
+省份A的文本在省份B加载时就已解析，第一批候选地址到达时探测就开始，总耗时接近最慢的单个阶段。
+不需要抓取的附加来源（如导入的其他列表，见 importer.py）与抓取同时在工作线程中加载，候选地址同样交给探测阶段。
+写出结果需要完整的频道列表，仍在流水线结束后进行。
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+
+from perf import span
+from prober import PROBE_ENABLED, ProbeSession
+from scrape_cache import CACHE_TTL, count_channels, text_hash
+
+# 阶段之间队列的容量
+QUEUE_SIZE = int(os.environ.get("SCRAPE_PIPELINE_QUEUE", "4"))
+
+# 抓取线程等待文本队列时检查解析阶段是否已退出的间隔（秒）
+DELIVER_POLL = 0.5
+
+_DONE = object()
+
+
+async def _run(cache, namespace, provinces, fetch, parse, candidate_urls, extra_sources, health, probe, ttl, queue_size,
+               prober_options):
+    loop = asyncio.get_running_loop()
+    now = time.time()
+    texts = asyncio.Queue(queue_size)
+    url_batches = asyncio.Queue(queue_size)
+    results = {}
+    consumer_done = threading.Event()
+
+    # 缓存未过期的省份直接复用，不再抓取
+    entries = {province: cache.get(namespace, province) for province in provinces}
+    to_fetch = []
+    for province in provinces:
+        entry = entries[province]
+        if entry is not None and entry.is_fresh(ttl, now):
+            print(f"♻️  {province} 缓存未过期（{entry.age(now):.0f} 秒前），直接复用")
+            results[province] = entry.channels
+        else:
+            to_fetch.append(province)
+
+    def fetch_all():
+        """在工作线程中抓取；每个省份完成时放入文本队列，队列满时在这里等待"""
+        delivered = set()
+
+        def deliver(province, text):
+            if province in to_fetch and province not in delivered and not consumer_done.is_set():
+                delivered.add(province)
+                future = asyncio.run_coroutine_threadsafe(texts.put((province, text)), loop)
+                # 分段等待：解析阶段异常退出后不再有人取文本，这时放弃放入，让抓取线程结束
+                while not consumer_done.is_set():
+                    try:
+                        future.result(timeout=DELIVER_POLL)
+                        return
+                    except concurrent.futures.TimeoutError:
+                        continue
+                future.cancel()
+
+        fetched = {}
+        with span("fetch", provinces=len(to_fetch)) as fetching:
+            try:
+                fetched = fetch(to_fetch, on_result=deliver) or {}
+            except Exception as e:
+                print(f"⚠️  抓取失败: {e}，尝试使用缓存")
+            fetching.set(fetched=sum(1 for text in fetched.values() if text is not None))
+        # 没有回调到的省份以返回值为准
+        for province in to_fetch:
+            deliver(province, fetched.get(province))
+
+    async def fetch_stage():
+        try:
+            if to_fetch:
+                await asyncio.to_thread(fetch_all)
+        finally:
+            if not consumer_done.is_set():
+                await texts.put(_DONE)
+
+    def parse_text(province, text):
+        with span("province.parse", province=province) as parsing:
+            channels = parse(text)
+            parsing.set(channels=count_channels(channels))
+        return channels
+
+    async def use_text(province, text):
+        """解析一个省份的页面文本（或在抓取失败、解析出错时改用缓存），结果写入 results"""
+        entry = entries[province]
+        if text is None:
+            if entry is not None:
+                print(f"♻️  {province} 抓取失败，使用 {entry.age(now):.0f} 秒前的缓存")
+                results[province] = entry.channels
+            else:
+                results[province] = None
+            return
+        digest = text_hash(text)
+        channels = None
+        if entry is not None and entry.text_hash == digest:
+            print(f"♻️  {province} 页面内容未变化，复用上次的解析结果")
+            channels = entry.channels
+        else:
+            try:
+                channels = await asyncio.to_thread(parse_text, province, text)
+            except Exception as e:
+                print(f"  ❌ 解析 {province} 时出错: {e}")
+        if channels is None:
+            results[province] = entry.channels if entry is not None else None
+            return
+        results[province] = channels
+        cache.put(namespace, province, digest, channels, now)
+
+    async def parse_stage():
+        try:
+            for province in provinces:
+                if province in results and candidate_urls is not None:
+                    await url_batches.put(candidate_urls(results[province]))
+            while (item := await texts.get()) is not _DONE:
+                province, text = item
+                # 一个省份出错（解析、写缓存、提取候选地址）只影响这个省份，队列必须继续消费
+                try:
+                    await use_text(province, text)
+                    if results[province] is not None and candidate_urls is not None:
+                        await url_batches.put(candidate_urls(results[province]))
+                except Exception as e:
+                    print(f"  ❌ 处理 {province} 时出错: {e}")
+                    results.setdefault(province, None)
+        finally:
+            # 不再消费文本队列后，抓取线程不能继续等待放入
+            consumer_done.set()
+        await url_batches.put(_DONE)
+
+    async def extra_stage():
+        try:
+            for name, load in extra_sources.items():
+                try:
+                    results[name] = await asyncio.to_thread(load)
+                except Exception as e:
+                    print(f"  ❌ 加载 {name} 时出错: {e}")
+                    results[name] = None
+                if results[name] is not None and candidate_urls is not None:
+                    await url_batches.put(candidate_urls(results[name]))
+        finally:
+            await url_batches.put(_DONE)
+
+    async def batches():
+        """逐批产出候选地址，直到解析阶段和附加来源都已结束"""
+        producers = 2
+        while producers:
+            urls = await url_batches.get()
+            if urls is _DONE:
+                producers -= 1
+            else:
+                yield urls
+
+    async def probe_stage():
+        if not probe:
+            async for _ in batches():
+                pass
+            return None
+
+        # 熔断主机上的地址跳过，同一个流只探测一次，结束时结果记入主机健康记录
+        session = ProbeSession(health, **prober_options)
+        with span("probe") as probing:
+            async for urls in batches():
+                started = bool(session.tasks)
+                session.submit(urls)
+                if session.tasks and not started:
+                    print("🔬 收到第一批候选地址，开始探测...")
+            results = await session.results()
+            alive = sum(1 for task in session.tasks.values() if task.result().alive)
+            probing.set(urls=len(results), streams=len(session.tasks), alive=alive)
+        return results
+
+    *_, probe_results = await asyncio.gather(fetch_stage(), parse_stage(), extra_stage(), probe_stage())
+    return {name: results.get(name) for name in (*provinces, *extra_sources)}, probe_results
+
+
+def run_pipeline(cache, namespace, provinces, fetch, parse, candidate_urls=None, extra_sources=None, health=None,
+                 probe=PROBE_ENABLED, ttl=CACHE_TTL, queue_size=QUEUE_SIZE, **prober_options):
+    """抓取、解析并探测各省份，返回 ({省份: 解析结果}, 探测结果)
+
+    fetch(省份列表, on_result=回调) 返回 {省份: 页面文本}；parse(页面文本) 返回可JSON序列化的解析结果，
+    完全拿不到的省份值为None。candidate_urls(解析结果) 返回其中的候选地址；probe 为真时探测这些地址，
+    探测结果为 {url: ProbeResult}（并记入主机健康记录），否则为None。
+    extra_sources 为 {名称: 加载函数}，加载函数直接返回解析结果（不缓存），结果按名称附在省份之后。
+    """
+    return asyncio.run(
+        _run(cache, namespace, provinces, fetch, parse, candidate_urls, extra_sources or {}, health, probe, ttl,
+             queue_size, prober_options)
+    )
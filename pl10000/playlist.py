@@ -0,0 +1,190 @@
+"""频道列表的内存模型与多格式输出
+
+脚本把抓取结果填充到 Playlist（分组 Section + 频道 Channel）后，
+由各个写出器一次遍历渲染成不同格式，不需要再解析已生成的文本：
+- txt：现有的 "频道名,地址" + "# ====== 分组 ======" 格式
+- m3u / m3u8：带 tvg-id、tvg-name、tvg-logo、group-title 的 EXTINF 列表
+- json：结构化数据
+
+频道的备用地址紧跟在主地址之后，以同名条目依次输出，播放器在主地址失效时可以切换。
+设置 SCRAPE_RELAY_BASE 时，输出中的 http(s) 地址改写为经由局域网转发服务的地址（见 relay.py）。
+"""
+import json
+import os
+
+from classifier import classify_channel
+from relay import RELAY_BASE, relay_url
+
+# 需要输出的格式，逗号分隔
+OUTPUT_FORMATS = [f.strip() for f in os.environ.get("SCRAPE_FORMATS", "txt,m3u,json").split(",") if f.strip()]
+
+# 台标和节目单地址
+LOGO_BASE_URL = "https://live.fanmingming.com/tv/"
+EPG_URL = "http://epg.51zmt.top:8000/e.xml"
+
+# 没有抓到地址的频道在 txt 中的占位写法
+PLACEHOLDER = "# 等待抓取有效源"
+
+
+class Channel:
+    """单个频道；url 为None表示尚未抓到有效源（占位），backups 为按优先级排列的备用地址"""
+
+    __slots__ = ("name", "url", "backups", "tvg_name", "logo")
+
+    def __init__(self, name, url=None, tvg_name=None, logo=None, backups=()):
+        self.name = name
+        self.url = url
+        self.backups = list(backups)
+        self.tvg_name = tvg_name or canonical_name(name)
+        self.logo = logo if logo is not None else LOGO_BASE_URL + self.tvg_name + ".png"
+
+    @classmethod
+    def from_line(cls, line):
+        """从 "频道名,地址" 行创建频道（保留原始写法，txt 输出与输入逐字节一致）"""
+        name, _, url = line.partition(',')
+        return cls(name, url)
+
+    @property
+    def is_placeholder(self):
+        return self.url is None
+
+    def urls(self):
+        """主地址和备用地址，占位频道没有地址"""
+        if self.is_placeholder:
+            return []
+        return [self.url] + self.backups
+
+
+class Section:
+    """输出中的一个分组"""
+
+    __slots__ = ("title", "group", "channels")
+
+    def __init__(self, title, group, channels=None):
+        self.title = title
+        self.group = group
+        self.channels = channels if channels is not None else []
+
+    def add(self, channel):
+        self.channels.append(channel)
+        return channel
+
+
+class Playlist:
+    """按顺序排列的分组集合"""
+
+    __slots__ = ("sections",)
+
+    def __init__(self):
+        self.sections = []
+
+    def section(self, title, group):
+        section = Section(title, group)
+        self.sections.append(section)
+        return section
+
+    def channels(self):
+        for section in self.sections:
+            yield from section.channels
+
+    def rewritten(self, rewrite):
+        """复制一份列表，每个地址经 rewrite 改写（名称、台标等不变）"""
+        playlist = Playlist()
+        for section in self.sections:
+            copy = playlist.section(section.title, section.group)
+            for channel in section.channels:
+                copy.add(Channel(
+                    channel.name,
+                    None if channel.is_placeholder else rewrite(channel.url),
+                    tvg_name=channel.tvg_name,
+                    logo=channel.logo,
+                    backups=[rewrite(url) for url in channel.backups],
+                ))
+        return playlist
+
+
+def canonical_name(name):
+    """规范频道名：CCTV 统一为 CCTV+编号，其他保持原名"""
+    result = classify_channel(name)
+    if result and result[0] == "cctv":
+        return result[1]
+    return name.strip()
+
+
+def render_txt(playlist):
+    """渲染为 "频道名,地址" 文本，分组之间空一行"""
+    lines = []
+    for index, section in enumerate(playlist.sections):
+        if index:
+            lines.append("")
+        lines.append(f"# ====== {section.title} ======")
+        for channel in section.channels:
+            for url in channel.urls() or [PLACEHOLDER]:
+                lines.append(f"{channel.name},{url}")
+    return "\n".join(lines) + "\n"
+
+
+def _attribute(value):
+    return value.replace('"', "'")
+
+
+def render_m3u(playlist):
+    """渲染为 M3U 列表，跳过占位频道；备用地址输出为相同 tvg-id 的条目"""
+    lines = [f'#EXTM3U x-tvg-url="{EPG_URL}"']
+    for section in playlist.sections:
+        for channel in section.channels:
+            extinf = (
+                f'#EXTINF:-1 tvg-id="{_attribute(channel.tvg_name)}" tvg-name="{_attribute(channel.tvg_name)}" '
+                f'tvg-logo="{_attribute(channel.logo)}" group-title="{_attribute(section.group)}",{channel.name.strip()}'
+            )
+            for url in channel.urls():
+                lines.append(extinf)
+                lines.append(url.strip())
+    return "\n".join(lines) + "\n"
+
+
+def render_json(playlist):
+    """渲染为 JSON"""
+    data = {
+        "groups": [
+            {
+                "title": section.title,
+                "group": section.group,
+                "channels": [
+                    {
+                        "name": channel.name.strip(),
+                        "url": None if channel.is_placeholder else channel.url.strip(),
+                        "backups": [url.strip() for url in channel.backups],
+                        "tvg_name": channel.tvg_name,
+                        "logo": channel.logo,
+                    }
+                    for channel in section.channels
+                ],
+            }
+            for section in playlist.sections
+        ]
+    }
+    return json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+
+
+# 格式 -> (文件扩展名, 写出器)
+WRITERS = {
+    "txt": (".txt", render_txt),
+    "m3u": (".m3u", render_m3u),
+    "m3u8": (".m3u8", render_m3u),
+    "json": (".json", render_json),
+}
+
+
+def render_all(playlist, formats=None, relay_base=RELAY_BASE):
+    """按格式渲染，返回 {扩展名: 内容}；relay_base 不为空时地址指向转发服务"""
+    if relay_base:
+        playlist = playlist.rewritten(lambda url: relay_url(url.strip(), relay_base))
+    rendered = {}
+    for fmt in formats or OUTPUT_FORMATS:
+        if fmt not in WRITERS:
+            print(f"⚠️  不支持的输出格式: {fmt}")
+            continue
+        extension, writer = WRITERS[fmt]
+        rendered[extension] = writer(playlist)
+    return rendered
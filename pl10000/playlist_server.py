@@ -0,0 +1,311 @@
+"""局域网播放列表服务：在内存中保存渲染好的列表，支持 ETag/Last-Modified 条件请求和 gzip
+
+播放器以前每次轮询都从仓库下载完整的 zby.txt / zbhb-pl10000.txt，即使内容没有变化。
+这个服务把生成的 TXT/M3U/JSON 列表读入内存并预先压缩：
+- 请求带 If-None-Match / If-Modified-Since 且内容未变化时返回 304，不发送正文
+- 客户端支持 gzip 时直接发送预先压缩好的正文，响应头也预先生成
+- 定时检查文件（scrape 脚本用原子替换写出），变化时在线程中重新读取和压缩，
+  再整体替换内存中的列表：正在进行的请求继续使用旧内容，新请求拿到完整的新内容
+- HTTP/1.1 长连接，空闲超时后断开
+
+    python pl10000/playlist_server.py --port 8080
+    curl -H 'Accept-Encoding: gzip' http://127.0.0.1:8080/zbhb-pl10000.m3u
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import math
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+# 默认提供的列表（相对于仓库根目录），URL 路径为 /文件名
+DEFAULT_FILES = [
+    f.strip()
+    for f in os.environ.get(
+        "SCRAPE_SERVE_FILES",
+        "zby.txt,zbhb-pl10000.txt,zbhb-pl10000.m3u,zbhb-pl10000.json,"
+        "zbhb1-pl10000.txt,zbhb1-pl10000.m3u,zbhb1-pl10000.json",
+    ).split(",")
+    if f.strip()
+]
+
+# 检查文件变化的间隔（秒）
+POLL_INTERVAL = float(os.environ.get("SCRAPE_SERVE_POLL", "2"))
+
+# 长连接的空闲超时（秒）
+IDLE_TIMEOUT = float(os.environ.get("SCRAPE_SERVE_IDLE", "15"))
+
+MAX_HEADER_LINES = 100
+
+CONTENT_TYPES = {
+    ".txt": "text/plain; charset=utf-8",
+    ".m3u": "audio/x-mpegurl; charset=utf-8",
+    ".m3u8": "application/vnd.apple.mpegurl; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+}
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class PlaylistEntry:
+    """一个列表在内存中的全部响应数据：原文、gzip 正文和预先生成的响应头"""
+
+    __slots__ = ("path", "signature", "body", "gzipped", "etags", "last_modified", "mtime", "_headers")
+
+    def __init__(self, path, signature, body, mtime):
+        self.path = path
+        self.signature = signature
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        # gzip 正文是不同的表示，使用不同的 ETag，避免缓存把两种正文混用
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        self.etags = {False: f'"{digest}"', True: f'"{digest}-gz"'}
+        self.mtime = int(mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        content_type = CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+        self._headers = {}
+        for compressed, body_length in ((False, len(self.body)), (True, len(self.gzipped))):
+            common = (
+                f"ETag: {self.etags[compressed]}\r\nLast-Modified: {self.last_modified}\r\n"
+                "Cache-Control: no-cache\r\nVary: Accept-Encoding\r\n"
+            )
+            encoding = "Content-Encoding: gzip\r\n" if compressed else ""
+            self._headers[compressed, False] = (
+                f"Content-Type: {content_type}\r\n{encoding}Content-Length: {body_length}\r\n{common}"
+            ).encode("latin-1")
+            self._headers[compressed, True] = common.encode("latin-1")  # 304 只带校验头
+
+    @classmethod
+    def load(cls, path, signature=None):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            body = f.read()
+        return cls(path, signature or file_signature(stat), body, stat.st_mtime)
+
+    def headers(self, compressed, not_modified=False):
+        return self._headers[compressed, not_modified]
+
+    def not_modified(self, if_none_match, if_modified_since, compressed=False):
+        """条件请求是否命中（If-None-Match 与将要发送的表示比较，存在时忽略 If-Modified-Since）"""
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or self.etags[compressed] in tags
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= self.mtime
+            except (TypeError, ValueError, IndexError):
+                return False
+        return False
+
+
+def file_signature(stat):
+    """判断文件是否变化：原子替换后 inode 会变，原地修改时 mtime/大小会变"""
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _quality(params):
+    """Accept-Encoding 一项的 q 值（0 到 1）；没有或无法解析时按 1 处理，nan/inf 按 0 处理"""
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                return 1.0
+            return min(max(quality, 0.0), 1.0) if math.isfinite(quality) else 0.0
+    return 1.0
+
+
+def accepts_gzip(accept_encoding):
+    """Accept-Encoding 中是否接受 gzip（q=0 表示不接受）；明确列出的 gzip 优先于 *"""
+    wildcard = None
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if coding == "gzip":
+            return _quality(params) > 0
+        if coding == "*" and wildcard is None:
+            wildcard = _quality(params) > 0
+    return bool(wildcard)
+
+
+class PlaylistServer:
+    """提供一组列表文件；entries 只会被整体替换，不会原地修改"""
+
+    def __init__(self, paths, poll_interval=POLL_INTERVAL, idle_timeout=IDLE_TIMEOUT):
+        self.routes = {"/" + os.path.basename(path): path for path in paths}
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.entries = {}
+        self.stats = {"requests": 0, "not_modified": 0, "gzip": 0, "bytes": 0, "reloads": 0}
+        self._date = (0, "")
+        self._server = None
+        self._watcher = None
+
+    def reload(self):
+        """重新读取有变化的文件，返回变化的路由；在线程中运行，最后一步才替换 entries"""
+        entries = dict(self.entries)
+        changed = []
+        for route, path in self.routes.items():
+            try:
+                signature = file_signature(os.stat(path))
+                current = entries.get(route)
+                if current is None or current.signature != signature:
+                    entries[route] = PlaylistEntry.load(path, signature)
+                    changed.append(route)
+            except FileNotFoundError:
+                if entries.pop(route, None) is not None:
+                    changed.append(route)
+            except OSError as e:
+                print(f"⚠️  读取 {path} 失败: {e}")
+        if changed:
+            self.entries = entries
+            self.stats["reloads"] += 1
+        return changed
+
+    async def watch(self):
+        """定时检查文件变化并热替换"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            changed = await asyncio.to_thread(self.reload)
+            if changed:
+                print(f"🔄 已重新加载: {', '.join(changed)}")
+
+    def _http_date(self):
+        now = int(time.time())
+        if self._date[0] != now:
+            self._date = (now, formatdate(now, usegmt=True))
+        return self._date[1]
+
+    def _response(self, status, headers=b"", body=b"", keep_alive=True):
+        head = (
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\nDate: {self._http_date()}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        ).encode("latin-1")
+        return head + headers + b"\r\n" + body
+
+    def _index(self):
+        """根路径列出可用的列表"""
+        body = "".join(f"{route}\n" for route in sorted(self.entries)).encode("utf-8")
+        return b"Content-Type: text/plain; charset=utf-8\r\nContent-Length: %d\r\n" % len(body), body
+
+    def respond(self, method, target, version, headers):
+        """生成一个请求的完整响应，返回 (响应字节, 是否保持连接)"""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        self.stats["requests"] += 1
+
+        if method not in ("GET", "HEAD"):
+            return self._response(405, b"Allow: GET, HEAD\r\nContent-Length: 0\r\n", keep_alive=False), False
+
+        route = target.split("?", 1)[0]
+        if route == "/":
+            extra, body = self._index()
+            return self._response(200, extra, b"" if method == "HEAD" else body, keep_alive), keep_alive
+
+        entry = self.entries.get(route)
+        if entry is None:
+            return self._response(404, b"Content-Length: 0\r\n", keep_alive=keep_alive), keep_alive
+
+        compressed = accepts_gzip(headers.get("accept-encoding"))
+        if entry.not_modified(headers.get("if-none-match"), headers.get("if-modified-since"), compressed):
+            self.stats["not_modified"] += 1
+            return self._response(304, entry.headers(compressed, not_modified=True), keep_alive=keep_alive), keep_alive
+
+        body = entry.gzipped if compressed else entry.body
+        if method == "HEAD":
+            body = b""
+        if compressed:
+            self.stats["gzip"] += 1
+        self.stats["bytes"] += len(body)
+        return self._response(200, entry.headers(compressed), body, keep_alive), keep_alive
+
+    async def _read_request(self, reader):
+        """读取请求行和请求头，连接关闭或空闲超时返回None"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+            if not request_line:
+                return None
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except asyncio.TimeoutError:
+            return None
+        return request_line.decode("latin-1").split(), headers
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                parts, headers = request
+                if len(parts) != 3:
+                    writer.write(self._response(400, b"Content-Length: 0\r\n", keep_alive=False))
+                    await writer.drain()
+                    break
+                response, keep_alive = self.respond(*parts, headers)
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="0.0.0.0", port=8080):
+        """读取所有列表，启动服务和文件检查任务，返回 asyncio Server；port=0 时由系统分配端口"""
+        await asyncio.to_thread(self.reload)
+        self._server = await asyncio.start_server(self.handle, host, port)
+        self._watcher = asyncio.ensure_future(self.watch())
+        return self._server
+
+    async def stop(self):
+        """停止文件检查和服务"""
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+def main():
+    workspace_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="局域网播放列表服务")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--root", default=workspace_root, help="列表文件所在目录（默认为仓库根目录）")
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL, help="检查文件变化的间隔（秒）")
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES, help="要提供的列表文件")
+    args = parser.parse_args()
+
+    async def serve():
+        playlists = PlaylistServer([os.path.join(args.root, f) for f in args.files], poll_interval=args.poll)
+        server = await playlists.start(args.host, args.port)
+        print(f"📡 播放列表服务已启动: http://{args.host}:{args.port}/")
+        for route in sorted(playlists.entries):
+            entry = playlists.entries[route]
+            print(f"  {route}  {len(entry.body)} 字节（gzip {len(entry.gzipped)} 字节）")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            stats = playlists.stats
+            print(f"📊 请求 {stats['requests']} 次，304 {stats['not_modified']} 次，gzip {stats['gzip']} 次，"
+                  f"发送 {stats['bytes']} 字节，重新加载 {stats['reloads']} 次")
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""直播源存活与质量探测
+
+用 asyncio 同时打开大量候选地址（全局和单个主机都有并发上限），记录首字节时间（TTFB），
+并在一个短窗口内统计持续吞吐量，据此为同一频道的候选地址排序，剔除失效的地址。
+rtp:// 和 udp:// 地址无法通过TCP探测，视为"未知"，排在存活的HTTP地址之后。
+
+可以用 ts_source.py 启动本地合成TS数据源来验证：
+    python pl10000/prober.py http://127.0.0.1:8900/rtp/a?rate=500000 http://127.0.0.1:8900/dead
+"""
+import asyncio
+import os
+import ssl
+import sys
+from urllib.parse import urljoin, urlsplit
+
+from candidates import MAX_CANDIDATES, host_of, quality_score, rank_all
+from snapshots import REPLAYING
+from stream_url import StreamIndex
+
+# 是否在保存前探测（默认关闭：在海外运行时大部分国内代理会超时，探测会误删可用的源；回放快照时不访问网络）。
+# 关闭时不会剔除失效的源，也不会按实测吞吐量排序，主机熔断记录只能来自以前的探测结果；
+# 工作流中由仓库变量 SCRAPE_PROBE 控制，本地运行时设置 SCRAPE_PROBE=1
+PROBE_ENABLED = os.environ.get("SCRAPE_PROBE", "0") == "1" and not REPLAYING
+
+# 吞吐量统计窗口（秒）
+PROBE_WINDOW = float(os.environ.get("SCRAPE_PROBE_WINDOW", "2"))
+CONNECT_TIMEOUT = float(os.environ.get("SCRAPE_PROBE_CONNECT_TIMEOUT", "3"))
+FIRST_BYTE_TIMEOUT = float(os.environ.get("SCRAPE_PROBE_FIRST_BYTE_TIMEOUT", "5"))
+
+# 全局并发数和单个主机的并发数
+MAX_CONCURRENCY = int(os.environ.get("SCRAPE_PROBE_CONCURRENCY", "200"))
+PER_HOST_CONCURRENCY = int(os.environ.get("SCRAPE_PROBE_PER_HOST", "4"))
+
+MAX_REDIRECTS = 3
+READ_CHUNK = 64 * 1024
+
+USER_AGENT = "Mozilla/5.0 (compatible; stream-prober)"
+
+
+class ProbeResult:
+    """单个地址的探测结果；alive 为 None 表示该协议无法探测"""
+
+    __slots__ = ("url", "alive", "status", "ttfb", "bytes_read", "throughput", "error")
+
+    def __init__(self, url, alive=False, status=None, ttfb=None, bytes_read=0, throughput=0.0, error=None):
+        self.url = url
+        self.alive = alive
+        self.status = status
+        self.ttfb = ttfb
+        self.bytes_read = bytes_read
+        self.throughput = throughput
+        self.error = error
+
+    def rank_key(self):
+        """排序键：存活优先，其次吞吐量高、首字节快"""
+        return (
+            0 if self.alive else (1 if self.alive is None else 2),
+            -self.throughput,
+            self.ttfb if self.ttfb is not None else float("inf"),
+        )
+
+    def __repr__(self):
+        if self.alive:
+            return f"<ProbeResult {self.url} ttfb={self.ttfb:.3f}s {self.throughput / 1024:.0f}KB/s>"
+        return f"<ProbeResult {self.url} alive={self.alive} error={self.error}>"
+
+
+async def open_stream(url):
+    """发送GET请求并解析响应头，返回 (reader, writer, status)，自动跟随重定向"""
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        port = parts.port or (443 if https else 80)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, port, ssl=ssl.create_default_context() if https else None),
+            CONNECT_TIMEOUT,
+        )
+        # 连接建立后的任何失败（超时、状态行格式错误等）都要关闭连接，否则卡住的端点会泄漏套接字
+        try:
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                f"Accept: */*\r\nConnection: close\r\n\r\n".encode("latin-1")
+            )
+            await writer.drain()
+
+            status_line = await asyncio.wait_for(reader.readline(), FIRST_BYTE_TIMEOUT)
+            if not status_line:
+                raise ConnectionError("连接被关闭")
+            status = int(status_line.split()[1])
+            location = None
+            while True:
+                line = await asyncio.wait_for(reader.readline(), FIRST_BYTE_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "location":
+                    location = value.strip()
+        except BaseException:
+            writer.close()
+            raise
+
+        if status in (301, 302, 303, 307, 308) and location:
+            writer.close()
+            url = urljoin(url, location)
+            continue
+        return reader, writer, status
+    raise ConnectionError("重定向次数过多")
+
+
+async def probe_url(url, window=PROBE_WINDOW):
+    """探测单个地址：记录首字节时间，并在 window 秒内统计吞吐量"""
+    if not url.startswith(("http://", "https://")):
+        return ProbeResult(url, alive=None, error="不支持探测的协议")
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    writer = None
+    try:
+        reader, writer, status = await open_stream(url)
+        if status != 200:
+            return ProbeResult(url, status=status, error=f"HTTP {status}")
+
+        first = await asyncio.wait_for(reader.read(READ_CHUNK), FIRST_BYTE_TIMEOUT)
+        if not first:
+            return ProbeResult(url, status=status, error="没有数据")
+        first_byte_at = loop.time()
+        ttfb = first_byte_at - started
+
+        total = len(first)
+        deadline = first_byte_at + window
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(READ_CHUNK), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            total += len(chunk)
+
+        elapsed = max(loop.time() - first_byte_at, 1e-3)
+        return ProbeResult(url, alive=True, status=status, ttfb=ttfb, bytes_read=total, throughput=total / elapsed)
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+        return ProbeResult(url, error=type(e).__name__ if not str(e) else str(e))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class StreamProber:
+    """带全局和单主机并发上限的批量探测器"""
+
+    def __init__(self, concurrency=MAX_CONCURRENCY, per_host=PER_HOST_CONCURRENCY, window=PROBE_WINDOW):
+        self.window = window
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(concurrency)
+        self._hosts = {}
+
+    def _host_limit(self, url):
+        host = host_of(url)
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def probe(self, url):
+        async with self._host_limit(url):
+            async with self._global:
+                return await probe_url(url, self.window)
+
+    async def probe_many(self, urls):
+        """并发探测多个地址（自动去重），返回 {url: ProbeResult}"""
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.probe(url) for url in unique))
+        return dict(zip(unique, results))
+
+
+class ProbeSession:
+    """一次采集中的探测：候选地址可以分批提交，提交后立即开始探测
+
+    提供主机健康记录时跳过熔断主机上的地址，并在结束时把探测结果记入健康记录；
+    同一代理上的同一组播组只探测一次，结果共用。
+    """
+
+    def __init__(self, health=None, **prober_options):
+        self.health = health
+        self.prober = StreamProber(**prober_options)
+        self.index = StreamIndex()
+        self.tasks = {}  # 实际探测的地址 -> 探测任务
+        self.requested = {}  # 提交的地址 -> 实际探测的地址
+        self.skipped = set()
+
+    def submit(self, urls):
+        """提交一批候选地址（需要在事件循环中调用）"""
+        for url in urls:
+            if url in self.requested or url in self.skipped:
+                continue
+            if self.health is not None and not self.health.allows(url):
+                self.skipped.add(url)
+                continue
+            if self.index.add(url):
+                self.tasks[url] = asyncio.ensure_future(self.prober.probe(url))
+            self.requested[url] = self.index.canonical(url)
+
+    async def results(self):
+        """等待所有探测完成，返回 {提交的地址: ProbeResult}（熔断跳过的地址不在其中）"""
+        if self.skipped:
+            open_hosts = ", ".join(sorted(h.host for h in self.health.open_hosts()))
+            print(f"  ⛔ 跳过 {len(self.skipped)} 个熔断主机上的地址: {open_hosts}")
+        probed = dict(zip(self.tasks, await asyncio.gather(*self.tasks.values())))
+        print(f"  🔬 探测了 {len(probed)} 个流（{len(self.requested)} 个候选地址）")
+        if self.health is not None:
+            self.health.record_results(probed)
+        return {url: probed[canonical] for url, canonical in self.requested.items()}
+
+
+def probe_with_health(urls, health=None, **prober_options):
+    """同步探测一批地址（跳过熔断主机，结果记入健康记录），返回 {url: ProbeResult}"""
+    async def run():
+        session = ProbeSession(health, **prober_options)
+        session.submit(urls)
+        return await session.results()
+
+    return asyncio.run(run())
+
+
+def probe_score(results):
+    """把探测结果转换成 rank_candidates 使用的评分函数
+
+    存活的地址按吞吐量、首字节时间排在前面，无法探测的协议排在其后，失效的地址剔除。
+    """
+    def score(url):
+        result = results.get(url)
+        if result is None:
+            return ProbeResult(url, alive=None).rank_key()
+        if result.alive is False:
+            return None
+        return result.rank_key()
+
+    return score
+
+
+def select_candidates(candidates, limit=MAX_CANDIDATES, streams=None, health=None, results=None, **prober_options):
+    """探测 {频道名: [地址...]} 中的所有地址，每个频道保留至多 limit 个存活地址
+
+    streams 为 {地址: StreamInfo} 时，存活的地址先按分辨率、帧率排序，再按实测吞吐量排序；
+    health 为主机健康记录时跳过熔断的主机，评分相同的地址优先使用健康的主机。
+    results 为已有的探测结果（如流水线中边解析边探测得到的）时不再重新探测。
+    """
+    if results is None:
+        urls = [url for channel_urls in candidates.values() for url in channel_urls]
+        print(f"🔬 探测 {len(urls)} 个候选地址...")
+        results = probe_with_health(urls, health, **prober_options)
+    score = quality_score(streams or {}, probe_score(results))
+    if health is not None:
+        score = health.score(score)
+    ranked = rank_all(candidates, score, limit)
+    print(f"  ✅ {len(ranked)}/{len(candidates)} 个频道有存活的地址")
+    return ranked
+
+
+def main():
+    urls = sys.argv[1:]
+    if not urls:
+        print("用法: python pl10000/prober.py <url> [<url> ...]")
+        return
+
+    async def run():
+        results = await StreamProber().probe_many(urls)
+        for result in sorted(results.values(), key=ProbeResult.rank_key):
+            print(result)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""多浏览器会话并行抓取各省份页面
+
+每个工作线程持有独立的WebDriver会话，从任务队列中领取省份，直接加载该省份的内容。
+单个省份或单个会话出错只影响它自己：出错的会话被丢弃，下一个任务时重新创建。
+总耗时接近最慢的省份，而不是所有省份之和。
+"""
+import os
+import queue
+import threading
+
+from browser import load_province
+from snapshots import capture_html
+
+# 并行的浏览器会话数
+POOL_SIZE = int(os.environ.get("SCRAPE_POOL_SIZE", "4"))
+
+
+def _quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def scrape_provinces(provinces, driver_factory, frame_url=None, province_links=None,
+                     pool_size=POOL_SIZE, seed_driver=None, on_result=None, idle_drivers=None):
+    """并行抓取各省份页面文本，返回 {省份: 文本}，失败的省份值为None
+
+    driver_factory 用于为每个工作线程创建会话；seed_driver 是调用方已打开的会话，
+    由第一个工作线程复用（不会在这里关闭）。on_result(省份, 文本) 在每个省份完成时调用。
+    idle_drivers 为会话列表时，工作线程优先取用其中已经启动的会话，结束后把仍然可用的会话
+    放回列表而不关闭（供常驻的浏览器服务在多次任务之间复用）。
+    """
+    province_links = province_links or {}
+    jobs = queue.Queue()
+    for province in provinces:
+        jobs.put(province)
+
+    results = {}
+    lock = threading.Lock()
+
+    def take_idle_driver():
+        with lock:
+            return idle_drivers.pop() if idle_drivers else None
+
+    def worker(index, driver):
+        owned = driver is None
+        try:
+            while True:
+                try:
+                    province = jobs.get_nowait()
+                except queue.Empty:
+                    return
+
+                print(f"📡 [会话{index}] 正在处理: {province}")
+                text = None
+                try:
+                    if driver is None:
+                        driver = take_idle_driver() or driver_factory()
+                        owned = True
+                    text = load_province(driver, province, frame_url, province_links.get(province))
+                except Exception as e:
+                    print(f"  ❌ [会话{index}] 处理 {province} 时出错: {e}")
+                    # 录制快照时保存出错时的页面源码
+                    if driver is not None:
+                        capture_html(province, lambda: driver.page_source)
+                    # 会话状态未知，丢弃后由下一个任务重新创建
+                    if driver is not None and owned:
+                        _quit_quietly(driver)
+                    driver = None
+
+                with lock:
+                    results[province] = text
+                if on_result:
+                    on_result(province, text)
+        finally:
+            if driver is not None and owned:
+                if idle_drivers is not None:
+                    with lock:
+                        idle_drivers.append(driver)
+                else:
+                    _quit_quietly(driver)
+
+    worker_count = max(1, min(pool_size, len(provinces)))
+    threads = []
+    for index in range(worker_count):
+        thread = threading.Thread(
+            target=worker,
+            args=(index + 1, seed_driver if index == 0 else None),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    return results
@@ -0,0 +1,356 @@
+"""直播流转发：同一个上游流只连接一次，字节流分发给局域网内的多个播放器
+
+同一栋楼里多个播放器打开同一个 http://.../rtp/239.49.1.5:6000 时，各自都会连到公网代理，
+上行带宽被占满，代理还会限速。转发模式下播放器改为连接本机：
+- 每个上游流（按 stream_key，同一代理上的同一组播组视为同一个流）只有一个上游连接
+- 上游数据写入共享的环形缓冲区（bytearray），每个客户端只记录自己的读取位置，不再各自缓存一份；
+  发送时复制出当前这一段（transport 可能持有写入的对象，直接传切片会被后来的数据覆盖）
+- 落后超过缓冲区容量、发送缓冲积压超过 CLIENT_BUFFER、或 SEND_TIMEOUT 秒内发不出去的慢客户端
+  直接断开，不拖累其他客户端
+- 新客户端从最近 BACKLOG 字节处（按 TS 包对齐）开始，播放器更快出画面
+- 最后一个客户端断开 IDLE_TIMEOUT 秒后关闭上游连接
+
+    python pl10000/relay.py --port 8090
+    播放器打开 http://<本机>:8090/stream?url=<URL编码的上游地址>，/status 查看各上游的客户端数
+
+设置 SCRAPE_RELAY_BASE=http://<本机>:8090 后，脚本输出的列表中的 http(s) 地址改写为指向转发服务（见 playlist.py）。
+可以用 ts_source.py 的合成TS数据源在本地验证：
+    python pl10000/ts_source.py --port 8900 &
+    curl -s 'http://127.0.0.1:8090/stream?url=http%3A%2F%2F127.0.0.1%3A8900%2Frtp%2F239.0.0.1%3A5000' | head -c 1000000 | wc -c
+"""
+import argparse
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs, quote, urlsplit
+
+from prober import CONNECT_TIMEOUT, FIRST_BYTE_TIMEOUT, READ_CHUNK, open_stream
+from stream_url import normalize_url, stream_key
+
+# 转发服务地址，设置后输出的列表指向转发服务
+RELAY_BASE = os.environ.get("SCRAPE_RELAY_BASE", "").rstrip("/")
+
+# 每个上游流的环形缓冲区大小（字节）
+BUFFER_SIZE = int(os.environ.get("SCRAPE_RELAY_BUFFER", str(4 * 1024 * 1024)))
+
+# 新客户端从最近多少字节开始发送
+BACKLOG = int(os.environ.get("SCRAPE_RELAY_BACKLOG", str(512 * 1024)))
+
+# 客户端发送缓冲积压超过此值（字节）视为慢客户端
+CLIENT_BUFFER = int(os.environ.get("SCRAPE_RELAY_CLIENT_BUFFER", str(1024 * 1024)))
+
+# 客户端多少秒内收不下已发送的数据视为慢客户端
+SEND_TIMEOUT = float(os.environ.get("SCRAPE_RELAY_SEND_TIMEOUT", "5"))
+
+# 最后一个客户端断开后保留上游连接的时间（秒）
+IDLE_TIMEOUT = float(os.environ.get("SCRAPE_RELAY_IDLE", "10"))
+
+TS_PACKET_SIZE = 188
+
+MAX_HEADER_LINES = 100
+
+
+class Overrun(Exception):
+    """读取位置已被新数据覆盖（客户端落后太多）"""
+
+
+class RingBuffer:
+    """定长环形缓冲区；written 为累计写入的字节数，读取位置用同一坐标表示"""
+
+    __slots__ = ("capacity", "written", "_view")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.written = 0
+        self._view = memoryview(bytearray(capacity))
+
+    @property
+    def oldest(self):
+        """仍在缓冲区中的最早位置"""
+        return max(0, self.written - self.capacity)
+
+    def write(self, data):
+        data = memoryview(data)
+        size = len(data)
+        if size > self.capacity:
+            data = data[-self.capacity:]
+        start = (self.written + size - len(data)) % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._view[start:start + first] = data[:first]
+        self._view[:len(data) - first] = data[first:]
+        self.written += size
+
+    def read(self, position, limit):
+        """从 position 开始最多 limit 字节的 memoryview 切片（绕回时为两段），没有新数据时为空"""
+        if position < self.oldest:
+            raise Overrun(position)
+        end = min(self.written, position + limit)
+        if end <= position:
+            return []
+        start = position % self.capacity
+        stop = start + (end - position)
+        if stop <= self.capacity:
+            return [self._view[start:stop]]
+        return [self._view[start:], self._view[:stop - self.capacity]]
+
+
+class Upstream:
+    """一个上游连接及其缓冲区，由所有请求同一个流的客户端共用"""
+
+    def __init__(self, url, buffer_size=BUFFER_SIZE, on_close=None):
+        loop = asyncio.get_running_loop()
+        self.url = url
+        self.on_close = on_close
+        self.buffer = RingBuffer(buffer_size)
+        self.clients = 0
+        self.dropped = 0
+        self.closed = False
+        self.error = None
+        self.ready = loop.create_future()  # 收到第一段数据（或失败）时完成
+        self._waiter = loop.create_future()
+        self._idle_handle = None
+        self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        writer = None
+        try:
+            reader, writer, status = await open_stream(self.url)
+            if status != 200:
+                raise ConnectionError(f"HTTP {status}")
+            while True:
+                chunk = await reader.read(READ_CHUNK)
+                if not chunk:
+                    break
+                self.buffer.write(chunk)
+                if not self.ready.done():
+                    self.ready.set_result(None)
+                self._notify()
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            self.error = str(e) or type(e).__name__
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.closed = True
+            if not self.ready.done():
+                self.ready.set_result(None)
+            self._notify()
+            if writer is not None:
+                writer.close()
+            if self.on_close is not None:
+                self.on_close(self)
+
+    def _notify(self):
+        """唤醒所有等待新数据的客户端"""
+        waiter, self._waiter = self._waiter, asyncio.get_running_loop().create_future()
+        waiter.set_result(None)
+
+    async def wait(self, position):
+        """等到 position 之后有新数据或上游结束"""
+        while position >= self.buffer.written and not self.closed:
+            # 等待中的客户端断开时不能取消共用的 future
+            await asyncio.shield(self._waiter)
+
+    def start_position(self, backlog=BACKLOG):
+        """新客户端的起始位置：最近 backlog 字节处，按 TS 包对齐"""
+        position = max(self.buffer.oldest, self.buffer.written - backlog)
+        position -= position % TS_PACKET_SIZE
+        if position < self.buffer.oldest:
+            position += TS_PACKET_SIZE
+        return position
+
+    def attach(self):
+        self.clients += 1
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    def detach(self, idle_timeout=IDLE_TIMEOUT):
+        """客户端断开；没有客户端时 idle_timeout 秒后关闭上游"""
+        self.clients -= 1
+        if self.clients == 0 and not self.closed:
+            self._idle_handle = asyncio.get_running_loop().call_later(idle_timeout, self.close)
+
+    def close(self):
+        self._task.cancel()
+
+
+class StreamRelay:
+    """按 stream_key 管理上游连接并为客户端转发数据"""
+
+    def __init__(self, buffer_size=BUFFER_SIZE, backlog=BACKLOG, client_buffer=CLIENT_BUFFER, idle_timeout=IDLE_TIMEOUT,
+                 send_timeout=SEND_TIMEOUT):
+        self.buffer_size = buffer_size
+        self.backlog = backlog
+        self.client_buffer = client_buffer
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        self.upstreams = {}
+
+    def acquire(self, url):
+        """取得（必要时建立）url 对应的上游连接并登记一个客户端"""
+        key = stream_key(url)
+        upstream = self.upstreams.get(key)
+        if upstream is None or upstream.closed:
+            upstream = self.upstreams[key] = Upstream(normalize_url(url), self.buffer_size, on_close=self._forget)
+        upstream.attach()
+        return upstream
+
+    def release(self, upstream):
+        upstream.detach(self.idle_timeout)
+
+    def _forget(self, upstream):
+        key = stream_key(upstream.url)
+        if self.upstreams.get(key) is upstream:
+            del self.upstreams[key]
+
+    def status(self):
+        return [
+            {
+                "url": upstream.url,
+                "clients": upstream.clients,
+                "bytes": upstream.buffer.written,
+                "dropped": upstream.dropped,
+                "closed": upstream.closed,
+                "error": upstream.error,
+            }
+            for upstream in self.upstreams.values()
+        ]
+
+    async def forward(self, upstream, writer):
+        """把上游数据发送给一个客户端，直到上游结束、客户端断开或落后太多"""
+        position = upstream.start_position(self.backlog)
+        transport = writer.transport
+        while True:
+            try:
+                views = upstream.buffer.read(position, READ_CHUNK)
+            except Overrun:
+                return self._drop(upstream, writer, "落后超过缓冲区")
+            if not views:
+                if upstream.closed:
+                    return
+                await upstream.wait(position)
+                continue
+            for view in views:
+                writer.write(bytes(view))
+                position += len(view)
+            if transport.get_write_buffer_size() > self.client_buffer:
+                return self._drop(upstream, writer, "发送积压过多")
+            # 不读取数据的客户端会让 drain 一直等待，超时后断开
+            try:
+                await asyncio.wait_for(writer.drain(), self.send_timeout)
+            except asyncio.TimeoutError:
+                return self._drop(upstream, writer, f"{self.send_timeout:g} 秒内没有收下数据")
+
+    def _drop(self, upstream, writer, reason):
+        """断开慢客户端；丢弃尚未发送的数据，之后的 drain 不会再等待"""
+        upstream.dropped += 1
+        print(f"🐢 客户端{reason}，断开: {upstream.url}")
+        writer.transport.abort()
+
+    async def handle(self, reader, writer):
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                return
+            method, target = request
+            parts = urlsplit(target)
+            if method != "GET":
+                writer.write(_response(405, b"Allow: GET\r\n"))
+            elif parts.path == "/status":
+                body = json.dumps(self.status(), ensure_ascii=False, indent=2).encode("utf-8")
+                writer.write(_response(200, b"Content-Type: application/json; charset=utf-8\r\n", body))
+            elif parts.path == "/stream":
+                url = parse_qs(parts.query).get("url", [""])[0]
+                if not url.startswith(("http://", "https://")):
+                    writer.write(_response(400))
+                else:
+                    await self._stream(url, writer)
+            else:
+                writer.write(_response(404))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, url, writer):
+        upstream = self.acquire(url)
+        try:
+            await asyncio.wait_for(asyncio.shield(upstream.ready), CONNECT_TIMEOUT + FIRST_BYTE_TIMEOUT)
+            if upstream.buffer.written == 0:
+                writer.write(_response(502))
+                return
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: video/mp2t\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            await self.forward(upstream, writer)
+        except asyncio.TimeoutError:
+            writer.write(_response(504))
+        finally:
+            self.release(upstream)
+
+    async def start(self, host="0.0.0.0", port=8090):
+        """启动转发服务，返回 asyncio Server；port=0 时由系统分配端口"""
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        for upstream in self.upstreams.values():
+            upstream.close()
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 502: "Bad Gateway",
+            504: "Gateway Timeout"}
+
+
+def _response(status, headers=b"", body=b""):
+    return (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n".encode("latin-1")
+        + headers + b"\r\n" + body
+    )
+
+
+async def _read_request(reader):
+    """读取请求行并跳过请求头，返回 (方法, 路径)"""
+    request_line = await asyncio.wait_for(reader.readline(), FIRST_BYTE_TIMEOUT)
+    for _ in range(MAX_HEADER_LINES):
+        if (await asyncio.wait_for(reader.readline(), FIRST_BYTE_TIMEOUT)) in (b"\r\n", b"\n", b""):
+            break
+    parts = request_line.decode("latin-1").split()
+    if len(parts) < 2:
+        return None
+    return parts[0], parts[1]
+
+
+def relay_url(url, base=RELAY_BASE):
+    """把 http(s) 地址改写为经由转发服务的地址；其他协议或未设置转发服务时原样返回"""
+    if not base or not url.startswith(("http://", "https://")):
+        return url
+    return f"{base.rstrip('/')}/stream?url={quote(url, safe='')}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="直播流转发（多个客户端共用一个上游连接）")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--buffer", type=int, default=BUFFER_SIZE, help="每个上游流的缓冲区大小（字节）")
+    parser.add_argument("--idle", type=float, default=IDLE_TIMEOUT, help="没有客户端后保留上游连接的秒数")
+    args = parser.parse_args()
+
+    async def serve():
+        relay = StreamRelay(buffer_size=args.buffer, idle_timeout=args.idle)
+        server = await relay.start(args.host, args.port)
+        print(f"🔁 转发服务已启动: http://{args.host}:{args.port}/stream?url=...")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            relay.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
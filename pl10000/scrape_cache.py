@@ -0,0 +1,96 @@
+"""按省份缓存抓取结果（SQLite，保存在 pl10000/ 下）
+
+每个省份按钮记录：页面文本的哈希、解析出的频道、抓取时间。
+- 页面内容没有变化时直接复用上次的解析结果，不再重新解析
+- 设置 SCRAPE_CACHE_TTL（秒）后，未过期的省份直接复用缓存，不再抓取
+- 抓取失败时回退到上次缓存的结果，保证 save_results 仍能输出完整的文件
+
+抓取过程中如何使用缓存见 pipeline.py。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from snapshots import REPLAYING
+
+# 回放快照时使用内存数据库：每次回放都完整解析，也不改动真实的缓存和主机健康记录
+CACHE_PATH = ":memory:" if REPLAYING else os.environ.get(
+    "SCRAPE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrape_cache.sqlite3"),
+)
+
+# 缓存有效期（秒），0 表示每次都重新抓取（内容未变时仍复用解析结果）
+CACHE_TTL = float(os.environ.get("SCRAPE_CACHE_TTL", "0"))
+
+
+def text_hash(text):
+    """页面文本的哈希"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CacheEntry:
+    """单个省份的缓存记录"""
+
+    __slots__ = ("text_hash", "channels", "fetched_at")
+
+    def __init__(self, text_hash, channels, fetched_at):
+        self.text_hash = text_hash
+        self.channels = channels
+        self.fetched_at = fetched_at
+
+    def age(self, now=None):
+        return (now or time.time()) - self.fetched_at
+
+    def is_fresh(self, ttl, now=None):
+        return ttl > 0 and self.age(now) < ttl
+
+
+class ScrapeCache:
+    """省份抓取结果的持久化缓存，按 (命名空间, 省份) 存储
+
+    命名空间区分不同的解析方式（两个脚本对同一省份的解析结果不同），
+    解析逻辑变化时修改命名空间中的版本号即可让旧缓存失效。
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS province_cache (
+                namespace TEXT NOT NULL,
+                province TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                channels TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (namespace, province)
+            )"""
+        )
+        self.connection.commit()
+
+    def get(self, namespace, province):
+        row = self.connection.execute(
+            "SELECT text_hash, channels, fetched_at FROM province_cache WHERE namespace = ? AND province = ?",
+            (namespace, province),
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(row[0], json.loads(row[1]), row[2])
+
+    def put(self, namespace, province, digest, channels, fetched_at=None):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO province_cache VALUES (?, ?, ?, ?, ?)",
+            (namespace, province, digest, json.dumps(channels, ensure_ascii=False), fetched_at or time.time()),
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def count_channels(parsed):
+    """统计解析结果中的频道条数（{键: [条目...]} 时求和，列表时取长度）"""
+    if isinstance(parsed, dict):
+        return sum(len(value) if isinstance(value, (list, tuple)) else 1 for value in parsed.values())
+    return len(parsed) if isinstance(parsed, (list, tuple)) else 0
@@ -0,0 +1,150 @@
+"""采集引擎：scrape_ips.py 和 scrape_ips_1.py 共用的采集流程，由 targets.json 中的配置驱动
+
+配置（profiles 中的一项）决定抓取哪些省份、导入哪些列表、保留哪些频道、输出文件名，
+以及频道的组织方式（layout，见 layouts.py）。新增一份列表只需要在 targets.json 中添加一个配置：
+
+    python pl10000/scrape_engine.py scrape_ips_1
+"""
+import os
+import sys
+
+from browser import build_chrome_options
+from fetchers import get_fetcher
+from host_health import HostHealthRegistry
+from importer import IMPORTS_ENABLED
+from layouts import get_layout
+from output_writer import publish_change_summary, write_outputs
+from perf import recorder, span
+from pipeline import run_pipeline
+from playlist import render_all
+from relay import RELAY_BASE
+from scrape_cache import ScrapeCache
+from targets import load_targets
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 输出文件明确保存在工作空间根目录
+WORKSPACE_ROOT = os.path.dirname(SCRIPT_DIR)
+
+# 导入的其他列表在合并结果中的名称（排在各省份之后）
+IMPORT_SOURCE = "导入列表"
+
+
+def setup_chrome_options():
+    """配置Chrome选项（无头模式，下载到当前工作目录）"""
+    return build_chrome_options(download_dir=os.getcwd())
+
+
+def save_playlist(playlist, output_path, backup_dir=SCRIPT_DIR, relay_base=RELAY_BASE):
+    """渲染并保存列表
+
+    txt 主文件和 backup_dir 中的备份只在内容变化时原子写入，其他格式（m3u/json）写在主文件旁边；
+    变化摘要写在主文件旁边的 .changes.json 中，供工作流判断是否需要提交。
+    SCRAPE_FORMATS 中没有 txt 时仍然写出 txt 主文件，地址同样按 relay_base 改写。
+    """
+    with span("render") as rendering:
+        rendered = render_all(playlist, relay_base=relay_base)
+        if ".txt" not in rendered:
+            rendered.update(render_all(playlist, formats=["txt"], relay_base=relay_base))
+        output_content = rendered.pop(".txt")
+        rendering.set(channels=sum(len(section.channels) for section in playlist.sections), formats=len(rendered) + 1)
+
+    backup_output = os.path.join(backup_dir, os.path.basename(output_path))
+    summaries = [write_outputs([output_path, backup_output], output_content)]
+    output_base = os.path.splitext(output_path)[0]
+    for extension, content in rendered.items():
+        summaries.append(write_outputs([output_base + extension], content, semantic_diff=False))
+
+    # 统计信息
+    lines = output_content.strip().split('\n')
+    print(f"\n🎉 数据采集完成!")
+    print(f"📊 频道统计:")
+    for section in playlist.sections:
+        print(f"  {section.title}: {len(section.channels)} 个")
+    print(f"  总计: {sum(len(section.channels) for section in playlist.sections)} 个频道")
+    print(f"📝 总行数: {len(lines)} 行")
+    print(f"💾 文件已保存为: {output_path}")
+
+    # 验证文件是否真的保存了
+    if os.path.exists(output_path):
+        file_size = os.path.getsize(output_path)
+        print(f"✅ 文件确认存在，大小: {file_size} 字节")
+    else:
+        print("❌ 警告: 文件似乎没有成功保存")
+
+    # 显示文件预览
+    print("\n📋 文件预览（前20行）:")
+    print("-" * 50)
+    for i, line in enumerate(lines[:20], 1):
+        print(f"{i:2}: {line}")
+    print("-" * 50)
+    print(f"📝 备份文件位于脚本目录: {backup_output}")
+
+    publish_change_summary(summaries, output_base + ".changes.json")
+
+
+def run(profile_name):
+    """按 targets.json 中的配置 profile_name 采集并写出列表"""
+    print("🚀 开始自动化采集直播源数据...")
+
+    # 打印调试信息：当前工作目录和脚本位置
+    print(f"📂 当前工作目录: {os.getcwd()}")
+    print(f"📂 脚本所在目录: {SCRIPT_DIR}")
+
+    targets = load_targets()
+    profile = targets.profile(profile_name)
+    layout = get_layout(profile)
+    output_path = os.path.join(WORKSPACE_ROOT, profile.output + ".txt")
+    print(f"📄 文件将保存到: {output_path}")
+
+    # 第一步：选择抓取后端（HTTP直连优先，遇到验证页面时回退到浏览器），打开省份缓存和主机健康记录
+    fetcher = get_fetcher(setup_chrome_options, debug_dir=WORKSPACE_ROOT)
+    cache = ScrapeCache()
+    health = HostHealthRegistry()
+
+    try:
+        # 第二步：抓取所有电信/联通页面，每个省份抓到后立即解析，解析出的候选地址立即开始探测（SCRAPE_PROBE=1 时启用，
+        # 熔断的主机不再探测）；内容未变化的省份复用缓存的解析结果，抓取失败时回退到缓存。
+        # 配置中的其他列表（imports）同时在进程池中导入，作为更多的候选地址
+        extra_sources = {}
+        if IMPORTS_ENABLED and profile.imports:
+            extra_sources[IMPORT_SOURCE] = lambda: layout.import_channels(profile.imports, WORKSPACE_ROOT)
+        results, probe_results = run_pipeline(
+            cache, f"{profile.name}:{layout.version}:{targets.digest}", profile.provinces, fetcher.fetch_provinces,
+            layout.parse, candidate_urls=layout.candidate_urls, extra_sources=extra_sources, health=health,
+        )
+
+        # 第三步：按省份顺序合并结果（导入的列表排在最后），保证输出稳定
+        for source in [*profile.provinces, *extra_sources]:
+            parsed = results.get(source)
+            if parsed is None:
+                print(f"  ❌ 未能获取 {source} 的页面内容")
+                continue
+            layout.collect(source, parsed)
+
+        # 第四步：组织频道（添加地方台，按探测结果排序并剔除失效的源），保存结果
+        save_playlist(layout.playlist(probe_results, health), output_path)
+
+    except Exception as e:
+        print(f"❌ 程序执行出错: {e}")
+
+        # 出错时保存当前已收集的数据（截图和页面源码由浏览器后端保存）
+        if layout.save_on_error:
+            save_playlist(layout.playlist(health=health), output_path)
+
+    finally:
+        fetcher.close()
+        cache.close()
+        health.close()
+
+        # 输出各阶段耗时
+        recorder.write_report(
+            os.path.join(WORKSPACE_ROOT, profile.output + ".perf.json"), script=profile.name, backend=fetcher.name
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("用法: python pl10000/scrape_engine.py <targets.json 中的配置名>")
+        sys.exit(2)
+    run(sys.argv[1])
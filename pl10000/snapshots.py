@@ -0,0 +1,210 @@
+"""页面快照的录制与回放
+
+网站改版或无法访问时，以前只留下 error_screenshot.png 和 error_page_source.html。
+设置 SCRAPE_SNAPSHOT 后：
+
+- record：正常抓取，同时把每个省份的页面文本和HTML按时间保存到快照目录
+  （每次运行一个子目录，manifest.json 记录各省份的抓取时间和大小；失败的省份尽量保存出错时的HTML）
+- replay：不启动浏览器、不访问网络，直接用快照驱动完整的 main() 流程。
+  每个省份取最新一次录制中的页面文本（只有HTML时转换成文本）；省份缓存和主机健康记录改用内存数据库，
+  探测关闭，每次回放都完整解析，结果稳定，适合开发和性能分析
+
+    SCRAPE_SNAPSHOT=record python pl10000/scrape_ips_1.py     # 录制
+    SCRAPE_SNAPSHOT=replay python pl10000/scrape_ips_1.py     # 回放最新的快照
+    SCRAPE_SNAPSHOT=replay SCRAPE_SNAPSHOT_RUN=20240101-080000 python pl10000/scrape_ips.py
+    python pl10000/snapshots.py list                          # 列出已录制的快照
+
+使用常驻浏览器服务时HTML在服务进程中，只录制页面文本。
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+# 快照模式：record、replay，留空则不录制也不回放
+SNAPSHOT_MODE = os.environ.get("SCRAPE_SNAPSHOT", "").lower()
+RECORDING = SNAPSHOT_MODE == "record"
+REPLAYING = SNAPSHOT_MODE == "replay"
+
+# 快照目录和回放时指定的录制批次（留空则每个省份取最新的录制）
+SNAPSHOT_DIR = os.environ.get(
+    "SCRAPE_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"),
+)
+SNAPSHOT_RUN = os.environ.get("SCRAPE_SNAPSHOT_RUN", "")
+
+MANIFEST_NAME = "manifest.json"
+
+# 正在录制的 SnapshotRecorder，抓取后端通过 capture_html 把页面源码交给它
+_active = None
+
+
+def capture_html(province, get_html):
+    """录制中时保存省份页面的HTML；get_html 只在录制时调用（读取 page_source 需要一次往返）"""
+    active = _active
+    if active is None:
+        return
+    try:
+        html = get_html()
+    except Exception:
+        return
+    if html:
+        active.add_html(province, html)
+
+
+def _timestamp(when=None):
+    return time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(when))
+
+
+def _write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def read_manifest(run_dir):
+    try:
+        with open(os.path.join(run_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"provinces": {}}
+
+
+def list_runs(directory=SNAPSHOT_DIR):
+    """已录制的批次名，按时间从新到旧"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (name for name in names if os.path.isfile(os.path.join(directory, name, MANIFEST_NAME))),
+        reverse=True,
+    )
+
+
+class SnapshotRecorder:
+    """包装抓取后端：照常抓取，同时把各省份的页面文本和HTML写入本次运行的快照目录"""
+
+    def __init__(self, fetcher, directory=SNAPSHOT_DIR):
+        self.fetcher = fetcher
+        self.name = fetcher.name
+        self.run_dir = os.path.join(directory, time.strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(self.run_dir, exist_ok=True)
+        # 同一秒内先后运行的两个脚本共用一个批次，合并各自的省份
+        self.manifest = read_manifest(self.run_dir)
+        self.manifest.update(recorded_at=_timestamp(), backend=fetcher.name)
+        self._lock = threading.Lock()
+
+    def _entry(self, province):
+        return self.manifest["provinces"].setdefault(province, {})
+
+    def add_html(self, province, html):
+        with self._lock:
+            _write_text(os.path.join(self.run_dir, f"{province}.html"), html)
+            self._entry(province).update(html=f"{province}.html", html_bytes=len(html.encode("utf-8")))
+
+    def _add_text(self, province, text):
+        with self._lock:
+            entry = self._entry(province)
+            entry["fetched_at"] = _timestamp()
+            if text is None:
+                entry["failed"] = True
+                return
+            _write_text(os.path.join(self.run_dir, f"{province}.txt"), text)
+            entry.pop("failed", None)
+            entry.update(text=f"{province}.txt", text_bytes=len(text.encode("utf-8")))
+
+    def fetch_provinces(self, provinces, on_result=None):
+        global _active
+
+        def on_fetched(province, text):
+            self._add_text(province, text)
+            if on_result:
+                on_result(province, text)
+
+        results = {}
+        _active = self
+        try:
+            results = self.fetcher.fetch_provinces(provinces, on_result=on_fetched)
+        finally:
+            _active = None
+            # 没有逐个回调到的省份（如抓取中途出错）以返回值为准补全
+            for province in provinces:
+                if "fetched_at" not in self.manifest["provinces"].get(province, {}):
+                    self._add_text(province, results.get(province))
+            _write_text(
+                os.path.join(self.run_dir, MANIFEST_NAME),
+                json.dumps(self.manifest, ensure_ascii=False, indent=2) + "\n",
+            )
+        recorded = sum(1 for province in provinces if results.get(province) is not None)
+        print(f"📼 已录制 {recorded}/{len(provinces)} 个省份的页面快照: {self.run_dir}")
+        return results
+
+    def close(self):
+        self.fetcher.close()
+
+
+class SnapshotReplayer:
+    """用录制的快照代替抓取：不启动浏览器，不访问网络"""
+
+    name = "replay"
+
+    def __init__(self, directory=SNAPSHOT_DIR, run=SNAPSHOT_RUN, html_to_text=None):
+        self.directory = directory
+        self.runs = [run] if run else list_runs(directory)
+        self.html_to_text = html_to_text
+
+    def load(self, province):
+        """返回 (页面文本, 批次名)，没有快照时返回 (None, None)"""
+        for run in self.runs:
+            run_dir = os.path.join(self.directory, run)
+            # 录制时失败的省份只留有出错页面，继续找更早的录制
+            if read_manifest(run_dir)["provinces"].get(province, {}).get("failed"):
+                continue
+            text_path = os.path.join(run_dir, f"{province}.txt")
+            if os.path.isfile(text_path):
+                with open(text_path, encoding="utf-8") as f:
+                    return f.read(), run
+            html_path = os.path.join(run_dir, f"{province}.html")
+            if self.html_to_text is not None and os.path.isfile(html_path):
+                with open(html_path, encoding="utf-8") as f:
+                    return self.html_to_text(f.read()), run
+        return None, None
+
+    def fetch_provinces(self, provinces, on_result=None):
+        if not self.runs:
+            print(f"⚠️  没有可回放的快照: {self.directory}")
+        results = {}
+        for province in provinces:
+            text, run = self.load(province)
+            if text is None:
+                print(f"  ⚠️  快照中没有 {province}")
+            else:
+                print(f"  📼 回放 {province}（{run}）")
+            results[province] = text
+            if on_result:
+                on_result(province, text)
+        return results
+
+    def close(self):
+        pass
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["list"]:
+        runs = list_runs()
+        if not runs:
+            print(f"没有已录制的快照: {SNAPSHOT_DIR}")
+        for run in runs:
+            manifest = read_manifest(os.path.join(SNAPSHOT_DIR, run))
+            provinces = manifest.get("provinces", {})
+            failed = [name for name, entry in provinces.items() if entry.get("failed")]
+            print(f"{run}  {manifest.get('backend', '?'):<9} {len(provinces) - len(failed)} 个省份"
+                  + (f"，失败: {'、'.join(failed)}" if failed else ""))
+    else:
+        print("用法: python pl10000/snapshots.py list")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""直播地址规范化和组播组索引
+
+同一个组播组常经由多个代理转发，例如 239.49.8.131:6000 既可以通过
+http://180.105.201.135:9981/rtp/ 访问，也可以通过 http://www.jstxsheng.com:28088/rtp/ 访问；
+汇总列表里还有嵌套的错误地址，如 http://A/rtp/http://A/rtp/239.94.0.1:5140。
+
+- normalize_url：修复嵌套（取最内层的完整地址），协议和主机转小写，去掉默认端口
+- parse_stream_url：把地址拆成 (代理, 类型, 组播组, 端口)，非组播地址只有代理
+- stream_key：去重用的键，组播地址为 (代理, 组播组, 端口)（/rtp/ 和 /udp/ 视为同一个流），其他地址为规范化后的地址
+- StreamIndex：按 stream_key 索引候选地址，O(1) 去重，并记录每个组播组可经由哪些代理访问
+"""
+import re
+from functools import lru_cache
+
+_SCHEME = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://')
+
+# udpxy/msd_lite 一类代理的路径：/rtp/239.1.1.1:5000、/udp/@239.1.1.1:5000
+_PROXY_PATH = re.compile(r'/(?P<kind>rtp|udp)/@?(?P<group>\d{1,3}(?:\.\d{1,3}){3}):(?P<port>\d{1,5})/?$', re.IGNORECASE)
+# 直接的组播地址：rtp://239.1.1.1:5000、udp://@239.1.1.1:5000
+_MULTICAST_NETLOC = re.compile(r'@?(?P<group>\d{1,3}(?:\.\d{1,3}){3}):(?P<port>\d{1,5})$')
+
+_DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+# 协议和主机都是小写且没有默认端口的地址（绝大多数），只要没有嵌套就无需改动
+_LOWERCASE_PREFIX = re.compile(r'[a-z][a-z0-9+.-]*://[^/A-Z]*(?:/|$)')
+_DEFAULT_PORT_PREFIX = re.compile(r'(?:http://[^/]*:80|https://[^/]*:443)(?:/|$)')
+
+
+def normalize_url(url):
+    """规范化地址；已经规范的地址原样返回"""
+    url = url.strip()
+    first = url.find("://")
+    if first < 0:
+        return url
+    if (url.find("://", first + 3) < 0 and _LOWERCASE_PREFIX.match(url)
+            and not _DEFAULT_PORT_PREFIX.match(url)):
+        return url
+
+    schemes = [
+        match for match in _SCHEME.finditer(url)
+        if match.start() == 0 or (url[match.start() - 1] == "/" and "?" not in url[:match.start()])
+    ]
+    if not schemes or schemes[0].start() != 0:
+        return url
+    if len(schemes) > 1:
+        # 嵌套地址（路径中又是一个完整地址）：外层代理无法转发，取最内层的那一个；查询参数中的地址不算
+        url = url[schemes[-1].start():]
+
+    scheme, _, rest = url.partition("://")
+    netloc, slash, path = rest.partition("/")
+    userinfo, at, host = netloc.rpartition("@")
+    host = host.lower()
+    scheme = scheme.lower()
+    default_port = _DEFAULT_PORTS.get(scheme)
+    if default_port and host.endswith(default_port):
+        host = host[:-len(default_port)]
+    return f"{scheme}://{userinfo}{at}{host}{slash}{path}"
+
+
+class StreamAddress:
+    """拆分后的地址：proxy 为代理的 host:port（直接组播时为None），group/port 为组播组和端口（非组播时为None）"""
+
+    __slots__ = ("url", "proxy", "kind", "group", "port")
+
+    def __init__(self, url, proxy, kind, group=None, port=None):
+        self.url = url
+        self.proxy = proxy
+        self.kind = kind
+        self.group = group
+        self.port = port
+
+    @property
+    def is_multicast(self):
+        return self.group is not None
+
+    @property
+    def key(self):
+        if self.group is None:
+            return self.url
+        return (self.proxy, self.group, self.port)
+
+    def __repr__(self):
+        if self.group is None:
+            return f"<StreamAddress {self.url}>"
+        return f"<StreamAddress {self.proxy or '-'} {self.kind} {self.group}:{self.port}>"
+
+
+@lru_cache(maxsize=65536)
+def parse_stream_url(url):
+    """规范化并拆分地址（按原始地址缓存）"""
+    url = normalize_url(url)
+    scheme, _, rest = url.partition("://")
+    netloc, _, path = rest.partition("/")
+
+    if scheme in ("rtp", "udp"):
+        direct = _MULTICAST_NETLOC.match(netloc)
+        if direct:
+            return StreamAddress(url, None, scheme, direct.group("group"), int(direct.group("port")))
+
+    proxy = netloc.rpartition("@")[2]
+    proxied = _PROXY_PATH.search("/" + path)
+    if proxied:
+        return StreamAddress(url, proxy, proxied.group("kind").lower(), proxied.group("group"), int(proxied.group("port")))
+    return StreamAddress(url, proxy, scheme)
+
+
+def stream_key(url):
+    """去重用的键：同一代理上的同一组播组视为同一个流"""
+    return parse_stream_url(url).key
+
+
+class StreamIndex:
+    """按 stream_key 索引的候选地址，每个流保留第一次出现的地址"""
+
+    __slots__ = ("_first", "_groups")
+
+    def __init__(self, urls=()):
+        self._first = {}
+        self._groups = {}  # (组播组, 端口) -> {代理: 地址}
+        for url in urls:
+            self.add(url)
+
+    def add(self, url):
+        """加入地址，返回该流是否第一次出现"""
+        address = parse_stream_url(url)
+        key = address.key
+        if key in self._first:
+            return False
+        self._first[key] = url
+        if address.is_multicast:
+            self._groups.setdefault((address.group, address.port), {})[address.proxy] = url
+        return True
+
+    def canonical(self, url):
+        """同一个流第一次出现的地址，未加入时返回None"""
+        return self._first.get(stream_key(url))
+
+    def __contains__(self, url):
+        return stream_key(url) in self._first
+
+    def __len__(self):
+        return len(self._first)
+
+    def urls(self):
+        """每个流一个地址，按加入的顺序"""
+        return list(self._first.values())
+
+    def proxies(self, group, port):
+        """可以访问该组播组的 {代理: 地址}"""
+        return dict(self._groups.get((group, int(port)), {}))
+
+    def groups(self):
+        """{(组播组, 端口): 代理数}"""
+        return {group: len(proxies) for group, proxies in self._groups.items()}
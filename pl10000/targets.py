@@ -0,0 +1,165 @@
+"""抓取目标配置：省份、规范频道（含别名）和地方台，从 targets.json 读取
+
+两个脚本共用同一份配置，增加省份或频道只需修改配置文件：
+- classifier：CCTV 前缀（CCTV、央视）、卫视和地方台关键字，编译成 classify_channel 使用的组合正则
+- cctv：规范编号（CCTV1…）、输出名称和可选的别名（aliases），编号范围决定分类器识别哪些 CCTV 频道
+- satellite：卫视列表（按此顺序输出）和可选的别名
+- local：地方台的名称和地址
+- profiles：每个脚本抓取的省份、卫视范围（all 为所有卫视，listed 只保留 satellite 中的）、添加的地方台、
+  导入的其他列表（imports，本地路径相对于仓库根目录，也可以是 http(s) 地址，见 importer.py）、
+  频道的组织方式（layout，见 layouts.py）和输出文件名（output，不含扩展名）
+
+配置只加载一次，匹配器在加载时编译并缓存；SCRAPE_TARGETS 可指定其他配置文件。
+配置的摘要（digest）用作省份缓存命名空间的一部分，修改配置后自动重新解析。
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from classifier import ChannelClassifier
+
+TARGETS_PATH = os.environ.get(
+    "SCRAPE_TARGETS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "targets.json"),
+)
+
+
+class CctvChannel:
+    """CCTV 规范频道"""
+
+    __slots__ = ("id", "name", "aliases")
+
+    def __init__(self, id, name, aliases=()):
+        self.id = id
+        self.name = name
+        self.aliases = tuple(aliases)
+
+    @property
+    def number(self):
+        return int(self.id.upper().removeprefix("CCTV"))
+
+
+class SatelliteChannel:
+    """卫视规范频道"""
+
+    __slots__ = ("name", "aliases")
+
+    def __init__(self, name, aliases=()):
+        self.name = name
+        self.aliases = tuple(aliases)
+
+
+class Profile:
+    """一个脚本的抓取目标"""
+
+    __slots__ = ("name", "provinces", "all_satellite", "local", "imports", "layout", "output", "_targets")
+
+    def __init__(self, name, provinces, all_satellite, local, targets, imports=(), layout="ranked", output=None):
+        self.name = name
+        self.provinces = list(provinces)
+        self.all_satellite = all_satellite
+        self.local = local  # {名称: 地址}，按配置顺序
+        self.imports = list(imports)
+        self.layout = layout
+        self.output = output or name
+        self._targets = targets
+
+    def accepts(self, classified):
+        """classify_channel 的结果是否属于本脚本的目标（CCTV 和卫视）"""
+        if not classified:
+            return False
+        category, name = classified
+        if category == "cctv":
+            return name in self._targets.cctv_ids
+        if category == "satellite":
+            return self.all_satellite or name in self._targets.satellite_names
+        return False
+
+
+class Targets:
+    """解析后的抓取目标配置，分类器在这里编译一次"""
+
+    def __init__(self, data):
+        try:
+            classifier = data.get("classifier", {})
+            self.cctv = [CctvChannel(c["id"], c["name"], c.get("aliases", ())) for c in data["cctv"]]
+            self.satellite = [SatelliteChannel(s["name"], s.get("aliases", ())) for s in data["satellite"]]
+            self.local = {channel["name"]: channel["url"] for channel in data.get("local", [])}
+            profiles = data["profiles"]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"抓取目标配置格式错误: {e!r}")
+
+        self.cctv_ids = {channel.id for channel in self.cctv}
+        self.satellite_names = {channel.name for channel in self.satellite}
+        self.digest = hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+
+        self._cctv_names = {channel.id: channel.name for channel in self.cctv}
+        self._aliases = {channel.id: channel.aliases for channel in self.cctv}
+        self._aliases.update((channel.name, channel.aliases) for channel in self.satellite)
+
+        # 别名（忽略大小写） -> (类别, 规范名)
+        aliases = {}
+        for channel in self.cctv:
+            aliases.update((alias.lower(), ("cctv", channel.id)) for alias in channel.aliases)
+        for channel in self.satellite:
+            aliases.update((alias.lower(), ("satellite", channel.name)) for alias in channel.aliases)
+
+        self.classifier = ChannelClassifier(
+            [channel.number for channel in self.cctv],
+            cctv_prefixes=classifier.get("cctv_prefixes", ("CCTV", "央视")),
+            satellite_keywords=classifier.get("satellite_keywords", ("卫视",)),
+            local_keywords=classifier.get("local_keywords", ()),
+            aliases=aliases,
+        )
+
+        self.profiles = {}
+        for name, profile in profiles.items():
+            missing = [local for local in profile.get("local", []) if local not in self.local]
+            if missing:
+                raise ValueError(f"配置 {name} 引用了未定义的地方台: {'、'.join(missing)}")
+            self.profiles[name] = Profile(
+                name,
+                profile.get("provinces", []),
+                profile.get("satellite", "all") == "all",
+                {local: self.local[local] for local in profile.get("local", [])},
+                self,
+                imports=profile.get("imports", ()),
+                layout=profile.get("layout", "ranked"),
+                output=profile.get("output"),
+            )
+
+    def profile(self, name):
+        try:
+            return self.profiles[name]
+        except KeyError:
+            raise ValueError(f"抓取目标配置中没有 {name}")
+
+    def aliases_of(self, name):
+        """CCTV 编号或卫视名称的别名"""
+        return self._aliases.get(name, ())
+
+    def canonical_name(self, name):
+        """把其他列表中的频道名统一为输出名称：CCTV 为配置中的名称，卫视别名为规范名，其他原样返回"""
+        result = self.classifier.classify(name)
+        if result is None or result[0] == "local":
+            return name
+        category, canonical = result
+        if category == "cctv":
+            return self._cctv_names.get(canonical, name)
+        return canonical
+
+    def cctv_keys(self):
+        """每个 CCTV 频道的匹配关键字 (编号, 名称, 别名...)"""
+        return [(channel.id, channel.name, *channel.aliases) for channel in self.cctv]
+
+    def satellite_keys(self):
+        """每个卫视的匹配关键字 (名称, 别名...)"""
+        return [(channel.name, *channel.aliases) for channel in self.satellite]
+
+
+@lru_cache(maxsize=None)
+def load_targets(path=TARGETS_PATH):
+    """读取并编译抓取目标配置（按路径缓存）"""
+    with open(path, encoding="utf-8") as f:
+        return Targets(json.load(f))
@@ -0,0 +1,102 @@
+"""本地合成 MPEG-TS 数据源，用于在不联网的情况下验证探测和转发
+
+每个路径可以单独设置首字节延迟和发送速率，例如：
+    python pl10000/ts_source.py --port 8900
+    curl http://127.0.0.1:8900/rtp/239.0.0.1:5000?rate=2000000&delay=0.1
+路径以 /dead 开头时直接断开连接，以 /404 开头时返回 404。
+"""
+import argparse
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+
+TS_PACKET_SIZE = 188
+TS_SYNC_BYTE = 0x47
+
+# 默认发送速率（字节/秒）和每次发送的包数
+DEFAULT_RATE = 1_000_000
+PACKETS_PER_CHUNK = 7
+
+
+def make_ts_chunk(continuity, packets=PACKETS_PER_CHUNK, pid=0x100):
+    """生成 packets 个 TS 包（同步字节 + PID + 连续计数，负载填充 0xFF）"""
+    chunk = bytearray()
+    for i in range(packets):
+        counter = (continuity + i) & 0x0F
+        header = bytes((TS_SYNC_BYTE, (pid >> 8) & 0x1F, pid & 0xFF, 0x10 | counter))
+        chunk += header + b"\xff" * (TS_PACKET_SIZE - len(header))
+    return bytes(chunk)
+
+
+async def _handle(reader, writer, default_rate, default_delay, duration):
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        target = urlsplit(parts[1] if len(parts) > 1 else "/")
+        query = parse_qs(target.query)
+        rate = float(query.get("rate", [default_rate])[0])
+        delay = float(query.get("delay", [default_delay])[0])
+
+        if target.path.startswith("/dead"):
+            return
+        if target.path.startswith("/404"):
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            return
+
+        await asyncio.sleep(delay)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: video/mp2t\r\nConnection: close\r\n\r\n")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = 0
+        continuity = 0
+        while duration is None or loop.time() - started < duration:
+            # 客户端断开后停止发送
+            if reader.at_eof():
+                break
+            chunk = make_ts_chunk(continuity)
+            continuity += PACKETS_PER_CHUNK
+            writer.write(chunk)
+            await writer.drain()
+            sent += len(chunk)
+            # 按目标速率控制发送节奏
+            ahead = sent / rate - (loop.time() - started)
+            if ahead > 0:
+                await asyncio.sleep(ahead)
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_ts_source(host="127.0.0.1", port=0, rate=DEFAULT_RATE, delay=0.0, duration=None):
+    """启动合成TS服务，返回 asyncio Server；port=0 时由系统分配端口"""
+    return await asyncio.start_server(
+        lambda r, w: _handle(r, w, rate, delay, duration), host, port
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地合成 MPEG-TS 数据源")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="默认发送速率（字节/秒）")
+    parser.add_argument("--delay", type=float, default=0.0, help="默认首字节延迟（秒）")
+    args = parser.parse_args()
+
+    async def serve():
+        server = await start_ts_source(args.host, args.port, args.rate, args.delay)
+        print(f"📺 合成TS数据源已启动: http://{args.host}:{args.port}/")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
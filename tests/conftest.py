@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 脚本模块按文件名直接导入（与 pl10000 中的脚本相同）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pl10000"))
@@ -0,0 +1,74 @@
+"""常驻浏览器服务（browser_service.py）：会话的配置目录分配，用假的 WebDriver 代替 Chrome"""
+import os
+import threading
+
+import pytest
+
+import browser_service
+from browser_service import BrowserService
+
+
+class FakeDriver:
+    def __init__(self, profile_dir):
+        self.profile_dir = profile_dir
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    started = threading.Barrier(4)
+
+    def fake_create_driver(profile_dir):
+        # 让并行的工作线程同时进入分配流程
+        started.wait(timeout=5)
+        return FakeDriver(profile_dir)
+
+    monkeypatch.setattr(browser_service, "create_driver", fake_create_driver)
+    return BrowserService(options_factory=lambda profile_dir: profile_dir, profile_dir=str(tmp_path))
+
+
+def test_parallel_sessions_get_distinct_profile_dirs(service, tmp_path):
+    drivers = []
+    lock = threading.Lock()
+
+    def start():
+        driver = service._new_driver()
+        with lock:
+            drivers.append(driver)
+
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(driver.profile_dir for driver in drivers) == [
+        os.path.join(str(tmp_path), f"session-{index}") for index in range(1, 5)
+    ]
+    assert all(os.path.isdir(driver.profile_dir) for driver in drivers)
+
+
+def test_quit_releases_the_profile_dir(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(browser_service, "create_driver", FakeDriver)
+    first = service._new_driver()
+    second = service._new_driver()
+    # 上次运行残留的 SingletonLock 不影响分配
+    open(os.path.join(first.profile_dir, "SingletonLock"), "w").close()
+
+    first.quit()
+    assert first.quit_calls == 1
+    assert service._new_driver().profile_dir == first.profile_dir
+    assert second.profile_dir == os.path.join(str(tmp_path), "session-2")
+
+
+def test_failed_start_releases_the_profile_dir(service, monkeypatch):
+    def failing_create_driver(profile_dir):
+        raise RuntimeError("Chrome 启动失败")
+
+    monkeypatch.setattr(browser_service, "create_driver", failing_create_driver)
+    with pytest.raises(RuntimeError):
+        service._new_driver()
+    assert service._reserved_slots == set()
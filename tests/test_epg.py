@@ -0,0 +1,115 @@
+"""XMLTV 节目单（epg.py）：解析、按频道的时间索引和查询"""
+import calendar
+import gzip
+
+import pytest
+
+from epg import ChannelSchedule, load_epg, parse_xmltv_time, write_sample
+
+# 频道 id 是编号，频道名只在 display-name 中；江苏卫视的节目不按时间排列，中间有一段空档的是 CCTV1
+XMLTV = """<?xml version="1.0" encoding="UTF-8"?>
+<tv>
+  <channel id="1"><display-name lang="zh">CCTV-1 综合</display-name></channel>
+  <channel id="2"><display-name lang="en">Jiangsu</display-name><display-name lang="zh">江苏卫视</display-name></channel>
+  <channel id="3"><display-name lang="zh">测试频道</display-name></channel>
+  <programme start="20240101080000 +0800" stop="20240101090000 +0800" channel="1"><title>朝闻天下</title></programme>
+  <programme start="20240101090000 +0800" stop="20240101100000 +0800" channel="1"><title>电视剧</title></programme>
+  <programme start="20240101103000 +0800" stop="20240101110000 +0800" channel="1"><title>天气预报</title></programme>
+  <programme start="20240101120000 +0800" stop="20240101130000 +0800" channel="2"><title>综艺</title></programme>
+  <programme start="20240101080000 +0800" stop="20240101100000 +0800" channel="2"><title>早间新闻</title></programme>
+  <programme start="20240101100000 +0800" stop="20240101120000 +0800" channel="2"><title>电视剧</title></programme>
+  <programme start="20240101080000 +0800" stop="20240101090000 +0800" channel="3"><title>测试节目</title></programme>
+</tv>
+"""
+
+
+def at(hour, minute=0):
+    """2024-01-01 东八区 hour:minute 的时间戳"""
+    return calendar.timegm((2024, 1, 1, hour - 8, minute, 0))
+
+
+def titles(programmes):
+    return [programme.title for programme in programmes]
+
+
+@pytest.fixture
+def xmltv_path(tmp_path):
+    path = tmp_path / "epg.xml"
+    path.write_text(XMLTV, encoding="utf-8")
+    return str(path)
+
+
+def test_parse_xmltv_time_with_and_without_offset():
+    assert parse_xmltv_time("20240101120000 +0800") == calendar.timegm((2024, 1, 1, 4, 0, 0))
+    assert parse_xmltv_time("20240101120000 -0130") == calendar.timegm((2024, 1, 1, 13, 30, 0))
+    # 省略时区按UTC，省略的秒按0
+    assert parse_xmltv_time("20240101120000") == calendar.timegm((2024, 1, 1, 12, 0, 0))
+    assert parse_xmltv_time("202401011200") == calendar.timegm((2024, 1, 1, 12, 0, 0))
+    with pytest.raises(ValueError):
+        parse_xmltv_time("2024-01-01")
+
+
+def test_display_name_maps_numeric_channel_ids(xmltv_path):
+    index = load_epg(xmltv_path)
+
+    assert set(index.schedules) == {"CCTV1", "Jiangsu", "测试频道"}
+    # tvg-name 和显示名都能查到
+    assert index.now("CCTV1", at(8, 30)).title == "朝闻天下"
+    assert index.now("CCTV-1综合", at(8, 30)).title == "朝闻天下"
+    assert "1" not in index
+
+
+def test_schedule_queries_at_boundaries(xmltv_path):
+    schedule = load_epg(xmltv_path).schedule("CCTV1")
+
+    assert schedule.at(at(7, 59)) is None
+    assert schedule.at(at(8)).title == "朝闻天下"  # 开始时间属于该节目
+    assert schedule.at(at(9)).title == "电视剧"  # 结束时间属于下一个节目
+    assert schedule.at(at(10)) is None  # 空档
+    assert schedule.at(at(11)) is None
+
+    assert schedule.after(at(7)).title == "朝闻天下"
+    assert schedule.after(at(8)).title == "电视剧"  # 严格在 timestamp 之后开始
+    assert schedule.after(at(10, 30)) is None
+
+    assert titles(schedule.between(at(9), at(10, 30))) == ["电视剧"]
+    assert titles(schedule.between(at(8, 59), at(10, 31))) == ["朝闻天下", "电视剧", "天气预报"]
+    assert schedule.between(at(10), at(10, 30)) == []
+
+
+def test_finish_sorts_out_of_order_programmes(xmltv_path):
+    schedule = ChannelSchedule("江苏卫视", ["综艺", "早间新闻"])
+    schedule.append(at(12), at(13), 0)
+    schedule.append(at(8), at(10), 1)
+    schedule.finish()
+    assert list(schedule.starts) == [at(8), at(12)]
+    assert list(schedule.stops) == [at(10), at(13)]
+    assert titles(schedule.between(at(0), at(23))) == ["早间新闻", "综艺"]
+
+    jiangsu = load_epg(xmltv_path, channels=["江苏卫视"]).schedule("江苏卫视")
+    assert titles(jiangsu.between(at(0), at(23))) == ["早间新闻", "电视剧", "综艺"]
+    assert jiangsu.at(at(12)).title == "综艺"
+
+
+def test_channel_and_time_window_filters(xmltv_path):
+    # 第一个显示名不是要的频道时，继续用其他显示名识别
+    index = load_epg(xmltv_path, channels=["CCTV1", "江苏卫视"])
+    assert set(index.schedules) == {"CCTV1", "江苏卫视"}
+    assert "测试频道" not in index
+
+    # 完全在 [since, until) 之外的节目丢弃，与窗口有重叠的保留
+    index = load_epg(xmltv_path, channels=["CCTV1"], since=at(9), until=at(10, 30))
+    assert titles(index.between("CCTV1", at(0), at(23))) == ["电视剧"]
+
+
+def test_sample_round_trip_with_gzip(tmp_path):
+    path = str(tmp_path / "sample.xml.gz")
+    start = at(0)
+    count = write_sample(path, days=1, start=start, slot=3600)
+    with gzip.open(path, "rb") as f:
+        assert f.read(5) == b"<?xml"
+
+    index = load_epg(path)
+    assert len(index) == count
+    assert index.now("CCTV1", start + 5400).title == "CCTV1 第2档"
+    assert index.next("江苏卫视", start + 5400).start == start + 7200
@@ -0,0 +1,70 @@
+"""频道组织方式（layouts.py）：组织前后的频道不能丢失"""
+import os
+
+import pytest
+
+from classifier import classify_channel
+from layouts import build_playlist, extract_valid_channels, filter_target_channels, get_base_channels
+from targets import load_targets
+
+WORKSPACE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def filled_channels(playlist):
+    """{分组标题: [有地址的频道名...]}"""
+    return {
+        section.title: [channel.name for channel in section.channels if not channel.is_placeholder]
+        for section in playlist.sections
+    }
+
+
+def test_unlisted_cctv_channels_go_to_other_section():
+    lines = [
+        "CCTV-1综合,http://10.0.0.1/rtp/239.0.0.1:5000",
+        "CCTV16,http://10.0.0.1/rtp/239.0.0.16:5000",
+        "CCTV5+,http://10.0.0.1/rtp/239.0.0.55:5000",
+        "CCTV-5体育,http://10.0.0.1/rtp/239.0.0.5:5000",
+        "CCTV4K,http://10.0.0.1/rtp/239.0.0.44:5000",
+        "江苏卫视,http://10.0.0.1/rtp/239.0.1.1:5000",
+        "湖南卫视,http://10.0.0.1/rtp/239.0.1.2:5000",
+    ]
+    cctv_channels, tv_stations = get_base_channels()
+    channels = filled_channels(build_playlist(lines, cctv_channels, tv_stations))
+
+    assert channels["CCTV频道"] == ["CCTV-1综合", "CCTV-5体育"]
+    assert channels["卫视频道"] == ["江苏卫视"]
+    assert channels["其他频道"] == ["CCTV16", "CCTV5+", "CCTV4K", "湖南卫视"]
+    assert sum(len(names) for names in channels.values()) == len(lines)
+
+
+@pytest.mark.parametrize("fixture", ["szdxyw", "jsdxudpy.txt"])
+def test_every_collected_channel_is_in_the_playlist(fixture):
+    """录制的列表中过滤出的每个频道名，在组织后都有对应的频道（模板项、卫视或其他频道）"""
+    with open(os.path.join(WORKSPACE_ROOT, fixture), encoding="utf-8") as f:
+        parsed = filter_target_channels(extract_valid_channels(f.read()))
+    lines = parsed["cctv"] + parsed["satellite"]
+    cctv_channels, tv_stations = get_base_channels()
+    playlist = build_playlist(lines, cctv_channels, tv_stations)
+
+    filled = {channel.name for channel in playlist.channels() if not channel.is_placeholder}
+    filled_cctv = {
+        cctv_num
+        for (cctv_num, _), channel in zip(cctv_channels, playlist.sections[0].channels)
+        if not channel.is_placeholder
+    }
+    targets = load_targets()
+    satellite_keys = {
+        tv: [key.lower() for key in (tv, *targets.aliases_of(tv))]
+        for tv, channel in zip(tv_stations, playlist.sections[1].channels)
+        if not channel.is_placeholder
+    }
+
+    missing = []
+    for name in {line.split(",", 1)[0].strip() for line in lines}:
+        result = classify_channel(name)
+        if name in filled or (result and result[0] == "cctv" and result[1] in filled_cctv):
+            continue
+        if any(key in name.lower() for keys in satellite_keys.values() for key in keys):
+            continue
+        missing.append(name)
+    assert missing == []
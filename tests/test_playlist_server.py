@@ -0,0 +1,143 @@
+"""局域网播放列表服务（playlist_server.py）：条件请求、gzip 协商和热替换"""
+import asyncio
+import gzip
+import os
+
+import pytest
+
+from playlist_server import PlaylistServer, accepts_gzip
+
+CONTENT = "# ====== CCTV频道 ======\nCCTV-1综合,http://10.0.0.1:8000/rtp/239.0.0.1:5000\n" * 20
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("GZIP ; Q=1.0", True),
+    ("gzip;q=0", False),
+    ("gzip;q=0.000", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("br", False),
+    # 明确列出的 gzip 优先于 *，不论先后
+    ("*;q=0.5, gzip;q=0", False),
+    ("gzip;q=0, *", False),
+    ("*;q=0, gzip", True),
+    # 无法解析的 q 值按 1 处理，nan/inf 不接受
+    ("gzip;q=abc", True),
+    ("gzip;q=nan", False),
+    ("gzip;q=inf", False),
+    ("*;q=-inf", False),
+    ("gzip;q=-1", False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) is expected
+
+
+def parse_response(response):
+    """把响应字节拆成 (状态码, 响应头, 正文)"""
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return int(lines[0].split()[1]), headers, body
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = tmp_path / "list.txt"
+    path.write_text(CONTENT, encoding="utf-8")
+    playlists = PlaylistServer([str(path)])
+    assert playlists.reload() == ["/list.txt"]
+    return playlists
+
+
+def get(server, method="GET", **headers):
+    response, _ = server.respond(method, "/list.txt", "HTTP/1.1", {
+        name.replace("_", "-"): value for name, value in headers.items()
+    })
+    return parse_response(response)
+
+
+def test_gzip_body_has_its_own_etag(server):
+    status, plain, body = get(server)
+    assert status == 200 and body == CONTENT.encode("utf-8")
+    assert "content-encoding" not in plain and plain["vary"] == "Accept-Encoding"
+
+    status, compressed, body = get(server, accept_encoding="gzip")
+    assert status == 200 and compressed["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == CONTENT.encode("utf-8")
+    assert int(compressed["content-length"]) == len(body)
+    assert compressed["etag"] == plain["etag"][:-1] + '-gz"'
+
+    # q=0 的 gzip 不能因为 * 而被压缩
+    _, headers, body = get(server, accept_encoding="*;q=0.5, gzip;q=0")
+    assert "content-encoding" not in headers and body == CONTENT.encode("utf-8")
+
+
+def test_conditional_requests(server):
+    _, plain, _ = get(server)
+    _, compressed, _ = get(server, accept_encoding="gzip")
+
+    status, headers, body = get(server, if_none_match=plain["etag"])
+    assert (status, body) == (304, b"") and headers["etag"] == plain["etag"]
+    status, headers, _ = get(server, accept_encoding="gzip", if_none_match=f'W/{compressed["etag"]}')
+    assert status == 304 and headers["etag"] == compressed["etag"]
+    # ETag 与将要发送的表示不一致时返回完整正文
+    assert get(server, accept_encoding="gzip", if_none_match=plain["etag"])[0] == 200
+    assert get(server, if_none_match=f'"other", {plain["etag"]}')[0] == 304
+    assert get(server, if_none_match="*")[0] == 304
+
+    assert get(server, if_modified_since=plain["last-modified"])[0] == 304
+    assert get(server, if_modified_since="Thu, 01 Jan 1970 00:00:00 GMT")[0] == 200
+    assert get(server, if_modified_since="不是日期")[0] == 200
+    # If-None-Match 存在时忽略 If-Modified-Since
+    assert get(server, if_none_match='"other"', if_modified_since=plain["last-modified"])[0] == 200
+
+    status, headers, body = get(server, method="HEAD")
+    assert (status, body) == (200, b"") and int(headers["content-length"]) == len(CONTENT.encode("utf-8"))
+    assert server.stats["not_modified"] == 5
+
+
+def test_reload_swaps_content_on_keep_alive_connection(tmp_path):
+    path = tmp_path / "list.txt"
+    path.write_text(CONTENT, encoding="utf-8")
+
+    async def request(reader, writer, etag=None):
+        conditional = f"If-None-Match: {etag}\r\n" if etag else ""
+        writer.write(f"GET /list.txt HTTP/1.1\r\nHost: test\r\nAccept-Encoding: gzip\r\n{conditional}\r\n".encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        status, headers, _ = parse_response(head)
+        body = await reader.readexactly(int(headers.get("content-length", 0))) if status == 200 else b""
+        return status, headers, body
+
+    async def run():
+        playlists = PlaylistServer([str(path)], poll_interval=0.05)
+        server = await playlists.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+        try:
+            status, headers, body = await request(reader, writer)
+            assert status == 200 and gzip.decompress(body) == CONTENT.encode("utf-8")
+            assert (await request(reader, writer, headers["etag"]))[0] == 304
+
+            # 与 scrape 脚本一样原子替换文件
+            replacement = tmp_path / "list.txt.tmp"
+            replacement.write_text(CONTENT + "江苏卫视,http://10.0.0.1:8000/rtp/239.0.1.1:5000\n", encoding="utf-8")
+            os.replace(replacement, path)
+            for _ in range(100):
+                if playlists.stats["reloads"] > 1:
+                    break
+                await asyncio.sleep(0.02)
+
+            status, new_headers, body = await request(reader, writer, headers["etag"])
+            assert status == 200 and new_headers["etag"] != headers["etag"]
+            assert gzip.decompress(body).decode("utf-8").endswith("江苏卫视,http://10.0.0.1:8000/rtp/239.0.1.1:5000\n")
+        finally:
+            writer.close()
+            await playlists.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,150 @@
+"""候选地址探测（prober.py）：用 ts_source.py 的合成TS数据源代替公网代理"""
+import asyncio
+import threading
+
+import pytest
+
+import ts_source
+from host_health import HostHealthRegistry
+from pipeline import run_pipeline
+from prober import StreamProber, probe_url, select_candidates
+from scrape_cache import ScrapeCache
+
+
+async def probe_against_source(paths, window=0.5):
+    """启动合成数据源，探测其上的各路径，返回 ({路径: 地址}, {地址: ProbeResult})"""
+    source = await ts_source.start_ts_source(rate=2_000_000)
+    base = f"http://127.0.0.1:{source.sockets[0].getsockname()[1]}"
+    try:
+        urls = {path: base + path for path in paths}
+        results = await StreamProber(window=window).probe_many(list(urls.values()))
+    finally:
+        source.close()
+        await source.wait_closed()
+    return urls, results
+
+
+def test_probe_results_for_live_and_dead_streams():
+    urls, results = asyncio.run(probe_against_source([
+        "/rtp/239.0.0.1:5000",
+        "/dead/rtp/239.0.0.2:5000",
+        "/404/rtp/239.0.0.3:5000",
+    ]))
+
+    live = results[urls["/rtp/239.0.0.1:5000"]]
+    assert live.alive and live.status == 200
+    assert live.bytes_read > 0 and live.ttfb is not None
+
+    dead = results[urls["/dead/rtp/239.0.0.2:5000"]]
+    assert dead.alive is False and dead.error
+
+    missing = results[urls["/404/rtp/239.0.0.3:5000"]]
+    assert missing.alive is False and missing.status == 404
+
+
+def test_unreachable_and_unsupported_urls():
+    async def run():
+        # 临时监听后立即关闭，得到一个没有服务的端口
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        return await probe_url(f"http://127.0.0.1:{port}/rtp/239.0.0.1:5000"), await probe_url("rtp://239.0.0.1:5000")
+
+    refused, unsupported = asyncio.run(run())
+    assert refused.alive is False and refused.error
+    assert unsupported.alive is None
+
+
+def test_select_candidates_ranks_by_throughput_and_drops_dead_urls():
+    fast = "/rtp/239.0.0.1:5000?rate=4000000"
+    slow = "/rtp/239.0.0.2:5000?rate=200000&delay=0.2"
+    dead = "/dead/rtp/239.0.0.3:5000"
+    missing = "/404/rtp/239.0.0.4:5000"
+    urls, results = asyncio.run(probe_against_source([fast, slow, dead, missing]))
+    assert results[urls[fast]].throughput > results[urls[slow]].throughput
+
+    candidates = {
+        "CCTV1": [urls[dead], urls[slow], urls[missing], urls[fast]],
+        "CCTV2": [urls[dead], urls[missing]],
+    }
+    selected = select_candidates(candidates, results=results)
+
+    # 存活的地址按吞吐量排序，失效的地址剔除；没有存活地址的频道不再输出
+    assert selected == {"CCTV1": [urls[fast], urls[slow]]}
+
+
+@pytest.fixture
+def source_in_thread():
+    """在后台线程中运行合成数据源（流水线自己调用 asyncio.run），返回其地址"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    source = asyncio.run_coroutine_threadsafe(ts_source.start_ts_source(rate=2_000_000), loop).result()
+    yield f"http://127.0.0.1:{source.sockets[0].getsockname()[1]}"
+    source.close()
+    asyncio.run_coroutine_threadsafe(source.wait_closed(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def unused_port():
+    async def run():
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        return port
+
+    return asyncio.run(run())
+
+
+def run_probing_pipeline(urls, health):
+    """把 urls 当作一个省份的页面内容跑一次流水线，返回探测结果"""
+    cache = ScrapeCache(":memory:")
+    try:
+        _, probe_results = run_pipeline(
+            cache, "test", ["省份"], lambda provinces, on_result: {"省份": "\n".join(urls)}, lambda text: text.split("\n"),
+            candidate_urls=lambda lines: lines, health=health, probe=True, window=0.3,
+        )
+    finally:
+        cache.close()
+    return probe_results
+
+
+def test_pipeline_probe_skips_open_hosts_and_records_health(source_in_thread):
+    live = f"{source_in_thread}/rtp/239.0.0.1:5000"
+    dead = f"{source_in_thread}/dead/rtp/239.0.0.2:5000"
+    open_host = f"127.0.0.1:{unused_port()}"
+    skipped = f"http://{open_host}/rtp/239.0.0.3:5000"
+
+    health = HostHealthRegistry(":memory:")
+    try:
+        health.get(open_host).record(0, 1, threshold=1)  # 该主机已熔断
+        results = run_probing_pipeline([live, dead, skipped], health)
+
+        assert results[live].alive and results[dead].alive is False
+        assert skipped not in results
+        # 同一主机上有存活的地址，不计连续失败
+        source_health = health.get(source_in_thread.split("//", 1)[1])
+        assert (source_health.successes, source_health.failures, source_health.consecutive_failures) == (1, 1, 0)
+        assert health.get(open_host).failures == 1  # 跳过的主机没有再探测
+    finally:
+        health.close()
+
+
+def test_pipeline_probe_opens_breaker_for_dead_host():
+    dead_host = f"127.0.0.1:{unused_port()}"
+    url = f"http://{dead_host}/rtp/239.0.0.1:5000"
+
+    health = HostHealthRegistry(":memory:")
+    try:
+        for _ in range(3):
+            results = run_probing_pipeline([url], health)
+        assert results[url].alive is False
+        assert not health.allows(url)
+        # 熔断后不再探测
+        assert run_probing_pipeline([url], health) == {}
+    finally:
+        health.close()
@@ -0,0 +1,138 @@
+"""转发服务（relay.py）：用 ts_source.py 的合成TS数据源代替公网代理"""
+import asyncio
+import time
+from urllib.parse import quote
+
+import pytest
+
+import ts_source
+from relay import Overrun, RingBuffer, StreamRelay
+
+UPSTREAM_PATH = "/rtp/239.0.0.1:5000"
+
+
+@pytest.fixture
+def upstream_connections(monkeypatch):
+    """记录合成数据源收到的连接数"""
+    connections = []
+    handle = ts_source._handle
+
+    async def counting_handle(reader, writer, *args):
+        connections.append(writer.get_extra_info("peername"))
+        await handle(reader, writer, *args)
+
+    monkeypatch.setattr(ts_source, "_handle", counting_handle)
+    return connections
+
+
+async def start_servers(**relay_options):
+    source = await ts_source.start_ts_source(rate=4_000_000)
+    relay = StreamRelay(**relay_options)
+    server = await relay.start("127.0.0.1", 0)
+    upstream_url = f"http://127.0.0.1:{source.sockets[0].getsockname()[1]}{UPSTREAM_PATH}"
+    return source, relay, server, upstream_url
+
+
+async def stop_servers(source, relay, server):
+    relay.close()
+    for running in (server, source):
+        running.close()
+        await running.wait_closed()
+
+
+async def open_client(server, upstream_url):
+    """连接转发服务并读完响应头，返回 (reader, writer, 状态码)"""
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /stream?url={quote(upstream_url, safe='')} HTTP/1.1\r\nHost: relay\r\n\r\n".encode("latin-1"))
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return reader, writer, status
+
+
+async def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        await asyncio.sleep(0.02)
+
+
+def test_ring_buffer_wraps_and_detects_overrun():
+    buffer = RingBuffer(10)
+    buffer.write(b"0123456")
+    buffer.write(b"789abc")
+    assert buffer.oldest == 3
+    assert b"".join(buffer.read(3, 100)) == b"3456789abc"
+    assert b"".join(buffer.read(8, 3)) == b"89a"
+    assert buffer.read(13, 100) == []
+    with pytest.raises(Overrun):
+        buffer.read(2, 100)
+
+
+def test_clients_share_one_upstream(upstream_connections):
+    async def run():
+        source, relay, server, upstream_url = await start_servers()
+        try:
+            clients = [await open_client(server, upstream_url) for _ in range(3)]
+            assert [status for _, _, status in clients] == [200, 200, 200]
+            for reader, _, _ in clients:
+                data = await reader.readexactly(ts_source.TS_PACKET_SIZE * 100)
+                # 每个客户端都从 TS 包边界开始
+                assert data[::ts_source.TS_PACKET_SIZE] == bytes([ts_source.TS_SYNC_BYTE]) * 100
+            assert len(upstream_connections) == 1
+            assert [status["clients"] for status in relay.status()] == [3]
+            for _, writer, _ in clients:
+                writer.close()
+        finally:
+            await stop_servers(source, relay, server)
+
+    asyncio.run(run())
+
+
+def test_client_that_stops_reading_is_dropped(capsys):
+    async def run():
+        # 积压上限设得很大，只能靠发送超时发现不读取数据的客户端
+        source, relay, server, upstream_url = await start_servers(client_buffer=1 << 30, send_timeout=0.3)
+        try:
+            stalled_reader, stalled_writer, _ = await open_client(server, upstream_url)
+            stalled_writer.transport.pause_reading()
+            reader, writer, _ = await open_client(server, upstream_url)
+            upstream = next(iter(relay.upstreams.values()))
+
+            await wait_until(lambda: upstream.dropped == 1, timeout=15)
+            await wait_until(lambda: upstream.clients == 1)
+            # 其他客户端不受影响
+            await reader.readexactly(ts_source.TS_PACKET_SIZE * 100)
+            writer.close()
+            stalled_writer.close()
+        finally:
+            await stop_servers(source, relay, server)
+
+    asyncio.run(run())
+    assert "没有收下数据" in capsys.readouterr().out
+
+
+def test_upstream_closes_after_last_client_leaves(upstream_connections):
+    async def run():
+        source, relay, server, upstream_url = await start_servers(idle_timeout=0.2)
+        try:
+            reader, writer, _ = await open_client(server, upstream_url)
+            await reader.readexactly(ts_source.TS_PACKET_SIZE * 10)
+            upstream = next(iter(relay.upstreams.values()))
+            writer.close()
+
+            await wait_until(lambda: upstream.clients == 0)
+            assert not upstream.closed  # 空闲超时之前保留上游连接
+            await wait_until(lambda: upstream.closed)
+            assert relay.upstreams == {}
+
+            # 之后的客户端重新连接上游
+            reader, writer, _ = await open_client(server, upstream_url)
+            await reader.readexactly(ts_source.TS_PACKET_SIZE * 10)
+            assert len(upstream_connections) == 2
+            writer.close()
+        finally:
+            await stop_servers(source, relay, server)
+
+    asyncio.run(run())
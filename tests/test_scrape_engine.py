@@ -0,0 +1,29 @@
+"""采集引擎（scrape_engine.py）：列表的渲染与保存"""
+import playlist
+from playlist import Channel, Playlist
+from relay import relay_url
+from scrape_engine import save_playlist
+
+RELAY_BASE = "http://192.168.1.2:8090"
+UPSTREAM = "http://10.0.0.1:8000/rtp/239.0.0.1:5000"
+
+
+def sample_playlist():
+    result = Playlist()
+    result.section("CCTV频道", "央视").add(Channel.from_line(f"CCTV-1综合,{UPSTREAM}"))
+    return result
+
+
+def test_txt_is_written_with_relay_urls_when_not_in_formats(tmp_path, monkeypatch):
+    monkeypatch.setattr(playlist, "OUTPUT_FORMATS", ["m3u"])
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+
+    save_playlist(sample_playlist(), str(tmp_path / "list.txt"), backup_dir=str(backup_dir), relay_base=RELAY_BASE)
+
+    txt = (tmp_path / "list.txt").read_text(encoding="utf-8")
+    # 没有配置 txt 格式时，txt 主文件与其他格式一样指向转发服务
+    assert f"CCTV-1综合,{relay_url(UPSTREAM, RELAY_BASE)}" in txt.splitlines()
+    assert (backup_dir / "list.txt").read_text(encoding="utf-8") == txt
+    assert relay_url(UPSTREAM, RELAY_BASE) in (tmp_path / "list.m3u").read_text(encoding="utf-8")
+    assert not (tmp_path / "list.json").exists()